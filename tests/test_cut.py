@@ -1,4 +1,5 @@
 import geopandas
+import numpy as np
 import geopandas.datasets
 import pytest
 from shapely import geometry, wkt
@@ -6,6 +7,24 @@ from shapely import geometry, wkt
 from topojson.core.cut import Cut
 
 
+# equal rings with a different start vertex are rotated to the same start vertex
+def test_cut_unsplit_rings_canonical_start():
+    data = {
+        "abcda": {
+            "type": "Polygon",
+            "coordinates": [[[1, 0], [1, 1], [0, 1], [0, 0], [1, 0]]],
+        },
+        "cdabc": {
+            "type": "Polygon",
+            "coordinates": [[[0, 1], [0, 0], [1, 0], [1, 1], [0, 1]]],
+        },
+    }
+    topo = Cut(data).to_dict()
+
+    assert topo["linestrings"][0].tolist() == topo["linestrings"][1].tolist()
+    assert topo["linestrings"][0][0].tolist() == [0, 0]
+
+
 # cut exact duplicate lines ABC & ABC have no cuts
 def test_cut_exact_duplicate_lines_ABC_ABC_no_cuts():
     data = {
@@ -44,7 +63,9 @@ def test_cut_overlapping_rings_are_cut():
     }
     topo = Cut(data).to_dict()
 
-    assert topo["bookkeeping_linestrings"].size == 4
+    indptr, indices = topo["bookkeeping_linestrings"]
+    assert indptr.tolist() == [0, 2, 4]
+    assert indices.tolist() == [0, 1, 2, 3]
     assert topo["bookkeeping_duplicates"].tolist() == [[3, 0]]
 
 
@@ -63,7 +84,9 @@ def test_cut_nybb_fast_split():
     data.set_index("BoroCode", inplace=True)
     topo = Cut(data).to_dict()
 
-    assert topo["bookkeeping_linestrings"].size == 4664
+    indptr, indices = topo["bookkeeping_linestrings"]
+    assert len(indptr) == 107
+    assert len(indices) == 190
 
 
 # this test was added since the fast_split was really slow on geometries
@@ -75,7 +98,9 @@ def test_cut_many_junctions():
     # current test ran in 8.182s (best of 3)
     topo = Cut(data).to_dict()
 
-    assert topo["bookkeeping_linestrings"].size == 11010
+    indptr, indices = topo["bookkeeping_linestrings"]
+    assert len(indptr) == 2203
+    assert len(indices) == 7891
 
 
 def test_cut_super_function_cut():
@@ -116,7 +141,9 @@ def test_cut_geomcol_multipolygon_polygon():
     }
     topo = Cut(data).to_dict()
 
-    assert topo["bookkeeping_linestrings"].size == 8
+    indptr, indices = topo["bookkeeping_linestrings"]
+    assert indptr.tolist() == [0, 2, 3, 4, 6]
+    assert indices.tolist() == [0, 1, 2, 3, 4, 5]
 
 
 def test_cut_junctions_coords():
@@ -429,3 +456,36 @@ def test_cut_extra_points_other_line_cut(shared_coords, junctions):
 
     assert len(topo["junctions"]) == junctions
     assert len(topo["bookkeeping_duplicates"]) == 2
+
+
+# a junction found in both objects is kept once, but still cuts both objects
+def test_cut_junctions_shared_by_topology_scopes():
+    admin = geopandas.GeoDataFrame(
+        geometry=[geometry.box(0, 0, 1, 1), geometry.box(1, 0, 2, 1)]
+    )
+    topo = Cut(
+        [admin, admin],
+        options={
+            "object_name": ["a", "b"],
+            "topology_scope": "object",
+            "prequantize": False,
+        },
+    ).to_dict()
+
+    assert topo["junctions"].tolist() == [[1.0, 0.0], [1.0, 1.0]]
+    assert len(topo["linestrings"]) == 8
+
+
+# a junction that is not in the table of vertices yet does not shift the keys of
+# the next linestrings
+def test_cut_split_mask_new_vertex():
+    data = {"ab": {"type": "LineString", "coordinates": [[0, 0], [1, 0]]}}
+    cut = Cut(data)
+    lines_xy = [
+        np.array([[0.0, 0.0], [1.0, 0.0], [2.0, 0.0]]),
+        np.array([[5.0, 5.0], [6.0, 5.0], [7.0, 5.0]]),
+    ]
+    splitters = [np.array([[1.0, 0.0]]), np.array([[6.0, 5.0], [9.0, 9.0]])]
+    split_mask = cut._split_mask(lines_xy, splitters)
+
+    assert split_mask.tolist() == [False, True, False, False, True, False]
@@ -205,8 +205,8 @@ def test_dedup_shared_paths_array_bk_sarcs_reference():
     topo = Dedup(data, options={"shared_coords": False}).to_dict()
 
     assert len(topo["bookkeeping_shared_arcs"]) == 1
-    junctions = [list(junction.coords) for junction in topo["junctions"]]
-    assert sorted(junctions) == sorted([[(1.0, 1.0)], [(3.0, 1.0)]])
+    junctions = topo["junctions"].tolist()
+    assert sorted(junctions) == sorted([[1.0, 1.0], [3.0, 1.0]])
 
 
 # this test was added since there is an error stating the following during Dedup:
@@ -290,3 +290,37 @@ def test_dedup_merge_continuous_shared_path():
 
     assert len(topo["linestrings"]) == 6
     assert len(topo["junctions"]) == 0
+
+
+# arcs are only stitched at nodes that are passed by every linestring using them,
+# the first arc of abcdbe is kept apart from the arc that doubles back
+def test_dedup_stitch_only_at_passed_nodes():
+    data = {
+        "abcdbe": {
+            "type": "LineString",
+            "coordinates": [[0, 0], [1, 0], [2, 0], [3, 0], [1, 0], [4, 0]],
+        },
+        "fbcg": {"type": "LineString", "coordinates": [[0, 1], [1, 0], [2, 0], [3, 1]]},
+    }
+    topo = Dedup(data, options={"prequantize": False}).to_dict()
+
+    assert topo["linestrings"][0].tolist() == [[0, 0], [1, 0]]
+    assert topo["bookkeeping_arcs"] == [[0, 3, 3, 1], [2, 3, 4]]
+
+
+# the shared arcs are kept as a mask indexed by arc
+def test_dedup_shared_arc_mask():
+    data = {
+        "abcda": {
+            "type": "Polygon",
+            "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]],
+        },
+        "befcb": {
+            "type": "Polygon",
+            "coordinates": [[[1, 0], [2, 0], [2, 1], [1, 1], [1, 0]]],
+        },
+    }
+    dedup = Dedup(data)
+
+    assert dedup._is_shared_arc.tolist() == [False, False, True]
+    assert dedup.output["bookkeeping_shared_arcs"] == [2]
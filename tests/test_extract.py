@@ -41,6 +41,28 @@ def test_extract_multipolygon():
     assert len(topo["linestrings"]) == 4
 
 
+# the linestrings of polygons are recorded as rings, also within a feature
+def test_extract_linestring_is_ring():
+    data = [
+        {
+            "type": "Feature",
+            "properties": {},
+            "geometry": {
+                "type": "Polygon",
+                "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 0]]],
+            },
+        },
+        {
+            "type": "Feature",
+            "properties": {},
+            "geometry": {"type": "LineString", "coordinates": [[0, 0], [1, 1]]},
+        },
+    ]
+    extract = Extract(data)
+
+    assert extract._linestring_is_ring == [True, False]
+
+
 # a LineString without coordinates is an empty polygon geometry
 def test_extract_empty_linestring():
     data = {"empty_ls": {"type": "LineString", "coordinates": None}}
@@ -314,3 +314,44 @@ def test_hashmap_read_multiple_gdf_object_name():
     ).to_dict()
 
     assert len(topo["objects"]) == 2
+
+
+# the arcs of each ring follow each other, shared arcs before the first non-shared
+# arc are followed backwards and the center square with only shared arcs is
+# reversed as a whole
+def test_hashmap_backward_arcs_follow_each_other():
+    data = geopandas.GeoDataFrame(
+        geometry=[geometry.box(x, y, x + 1, y + 1) for x in range(3) for y in range(3)]
+    )
+    topo = Hashmap(data, options={"prequantize": False}).to_dict()
+
+    for geom in topo["objects"]["data"]["geometries"]:
+        arcs = [
+            topo["linestrings"][~arc][::-1] if arc < 0 else topo["linestrings"][arc]
+            for arc in geom["arcs"][0]
+        ]
+        for arc, next_arc in zip(arcs, arcs[1:] + arcs[:1]):
+            assert arc[-1].tolist() == next_arc[0].tolist()
+
+
+# the geoms of each part are replaced by the arcs of their rings
+def test_hashmap_resolve_parts_of_geometrycollection():
+    data = {
+        "foo": {
+            "type": "GeometryCollection",
+            "geometries": [
+                {"type": "LineString", "coordinates": [[0, 0], [1, 0], [2, 0]]},
+                {
+                    "type": "MultiLineString",
+                    "coordinates": [[[1, 1], [1, 0], [1, -1]], [[5, 5], [6, 6]]],
+                },
+                {"type": "MultiPoint", "coordinates": [[1, 1], [2, 2]]},
+            ],
+        }
+    }
+    topo = Hashmap(data).to_dict()
+    geoms = topo["objects"]["data"]["geometries"][0]["geometries"]
+
+    assert geoms[0]["arcs"] == [0]
+    assert geoms[1]["arcs"] == [[1], [2]]
+    assert geoms[2]["coordinates"] == [[[0]], [[1]]]
@@ -1,8 +1,10 @@
 import geopandas
+import pytest
 import geopandas.datasets
 from shapely import geometry, wkt
 
 from topojson.core.join import Join
+from topojson.ops import SHAPELY_GE_20
 
 
 # the returned hashmap has undefined for non-junction points
@@ -24,7 +26,7 @@ def test_join_duplicate_lines_junction_endpoints():
     }
     topo = Join(data).to_dict()
 
-    assert topo["junctions"] == []
+    assert len(topo["junctions"]) == 0
 
 
 # reversed duplicate lines ABC & CBA have no junctions
@@ -35,7 +37,7 @@ def test_join_reversed_duplicate_lines_junction_endpoints():
     }
     topo = Join(data).to_dict()
 
-    assert topo["junctions"] == []
+    assert len(topo["junctions"]) == 0
 
 
 # when an old arc ABC extends a new arc AB, there is a junction at B
@@ -167,7 +169,7 @@ def test_join_single_ring_AA():
     data = {"aa": {"type": "Polygon", "coordinates": [[0, 0], [0, 0]]}}
     topo = Join(data).to_dict()
 
-    assert topo["junctions"] == []
+    assert len(topo["junctions"]) == 0
 
 
 # test the shared_paths_approach using dicts
@@ -653,8 +655,8 @@ def test_join_shared_paths_true_for_junction_points():
     }
     topo = Join(data, options={"shared_coords": False}).to_dict()
 
-    junctions = [list(junction.coords) for junction in topo["junctions"]]
-    assert sorted(junctions) == sorted([[(0.0, 0.0)], [(1.0, 0.0)]])
+    junctions = topo["junctions"].tolist()
+    assert sorted(junctions) == sorted([[0.0, 0.0], [1.0, 0.0]])
 
 
 # forward backward lines
@@ -701,7 +703,7 @@ def test_join_shared_paths_exact_duplicate_rings():
     }
     topo = Join(data, options={"shared_coords": False}).to_dict()
 
-    assert topo["junctions"] == []
+    assert len(topo["junctions"]) == 0
 
 
 # reversed duplicate rings ABCA & ACBA have no junctions
@@ -712,7 +714,7 @@ def test_join_shared_paths_reversed_duplicate_rings():
     }
     topo = Join(data, options={"shared_coords": False}).to_dict()
 
-    assert topo["junctions"] == []
+    assert len(topo["junctions"]) == 0
 
 
 # rotated duplicate rings BCAB & ABCA have no junctions
@@ -722,7 +724,7 @@ def test_join_shared_paths_rotated_duplicate_rings():
         "bcab": {"type": "Polygon", "coordinates": [[[1, 1], [2, 0], [0, 0], [1, 1]]]},
     }
     topo = Join(data, options={"shared_coords": False}).to_dict()
-    assert topo["junctions"] == []
+    assert len(topo["junctions"]) == 0
 
 
 # ring ABCA & line ABCA have no junction at A
@@ -739,7 +741,7 @@ def test_join_shared_paths_equal_ring_and_line_no_junctions():
     }
     topo = Join(data, options={"shared_coords": False}).to_dict()
 
-    assert topo["junctions"] == []
+    assert len(topo["junctions"]) == 0
 
 
 # ring ABCA & line ABCA have no junctions
@@ -756,7 +758,7 @@ def test_join_shared_paths_rotated_ring_and_line_no_junctions():
     }
     topo = Join(data, options={"shared_coords": False}).to_dict()
 
-    assert topo["junctions"] == []
+    assert len(topo["junctions"]) == 0
 
 
 # when a new arc ADE shares its start with an old arc ABC, there is no junction at A
@@ -767,7 +769,7 @@ def test_join_shared_paths_line_ADE_share_starts_with_ABC():
     }
     topo = Join(data, options={"shared_coords": False}).to_dict()
 
-    assert topo["junctions"] == []
+    assert len(topo["junctions"]) == 0
 
 
 # ring ABA has no junctions
@@ -777,7 +779,7 @@ def test_join_shared_paths_single_ring_ABCA():
     }
     topo = Join(data, options={"shared_coords": False}).to_dict()
 
-    assert topo["junctions"] == []
+    assert len(topo["junctions"]) == 0
 
 
 # when a new line DEC shares its end with an old line ABC, there is no junction at C
@@ -787,7 +789,7 @@ def test_join_shared_paths_line_DEC_share_line_ABC():
         "dec": {"type": "LineString", "coordinates": [[0, 1], [1, 1], [2, 0]]},
     }
     topo = Join(data, options={"shared_coords": False}).to_dict()
-    assert topo["junctions"] == []
+    assert len(topo["junctions"]) == 0
 
 
 # when a new line starts BC in the middle of an old line ABC, there is a
@@ -799,8 +801,8 @@ def test_join_shared_paths_line_ABC_extends_line_BC():
     }
     topo = Join(data, options={"shared_coords": False}).to_dict()
 
-    junctions = [list(junction.coords) for junction in topo["junctions"]]
-    assert sorted(junctions) == sorted([[(1.0, 0.0)], [(2.0, 0.0)]])
+    junctions = topo["junctions"].tolist()
+    assert sorted(junctions) == sorted([[1.0, 0.0], [2.0, 0.0]])
 
 
 # when a new line ABD deviates from an old line ABC, there is a junction at B
@@ -811,8 +813,8 @@ def test_join_shared_paths_line_ABD_deviates_line_ABC():
     }
     topo = Join(data, options={"shared_coords": False}).to_dict()
 
-    junctions = [list(junction.coords) for junction in topo["junctions"]]
-    assert sorted(junctions) == sorted([[(0.0, 0.0)], [(2.0, 0.0)]])
+    junctions = topo["junctions"].tolist()
+    assert sorted(junctions) == sorted([[0.0, 0.0], [2.0, 0.0]])
 
 
 # when a new line ABD deviates from a reversed old line CBA, there is a
@@ -837,8 +839,8 @@ def test_join_shared_paths_line_DBC_merge_line_ABC():
     }
     topo = Join(data, options={"shared_coords": False}).to_dict()
 
-    junctions = [list(junction.coords) for junction in topo["junctions"]]
-    assert sorted(junctions) == sorted([[(1.0, 0.0)], [(2.0, 0.0)]])
+    junctions = topo["junctions"].tolist()
+    assert sorted(junctions) == sorted([[1.0, 0.0], [2.0, 0.0]])
 
 
 # when a new line DBC merges into a reversed old line CBA, there is a junction at B
@@ -849,8 +851,8 @@ def test_join_shared_paths_line_DBC_merge_reversed_line_CBA():
     }
     topo = Join(data, options={"shared_coords": False}).to_dict()
 
-    junctions = [list(junction.coords) for junction in topo["junctions"]]
-    assert sorted(junctions) == sorted([[(1.0, 0.0)], [(2.0, 0.0)]])
+    junctions = topo["junctions"].tolist()
+    assert sorted(junctions) == sorted([[1.0, 0.0], [2.0, 0.0]])
 
 
 # when a new line DBE shares a single midpoint with an old line ABC, there is
@@ -861,7 +863,7 @@ def test_join_shared_paths_line_DBE_share_singe_midpoint_line_ABC():
         "dbe": {"type": "LineString", "coordinates": [[0, 1], [1, 0], [2, 1]]},
     }
     topo = Join(data, options={"shared_coords": False}).to_dict()
-    assert topo["junctions"] == []
+    assert len(topo["junctions"]) == 0
 
 
 # when a new line ABDE skips a point with an old line ABCDE, there is a no junction
@@ -874,7 +876,7 @@ def test_join_shared_paths_line_ABDE_skips_point_line_ABCDE():
         "abde": {"type": "LineString", "coordinates": [[0, 0], [1, 0], [3, 0], [4, 0]]},
     }
     topo = Join(data, options={"shared_coords": False}).to_dict()
-    assert topo["junctions"] == []
+    assert len(topo["junctions"]) == 0
 
 
 # when a new line ABDE skips a point with a reversed old line EDCBA, there is
@@ -888,7 +890,7 @@ def test_join_shared_paths_line_ABDE_skips_point_reversed_line_EDCBA():
         "abde": {"type": "LineString", "coordinates": [[0, 0], [1, 0], [3, 0], [4, 0]]},
     }
     topo = Join(data, options={"shared_coords": False}).to_dict()
-    assert topo["junctions"] == []
+    assert len(topo["junctions"]) == 0
 
 
 # when a line ABCDBE self-intersects with its middle, there are no junctions
@@ -901,7 +903,7 @@ def test_join_shared_paths_line_ABCDBE_self_intersects_with_middle():
     }
     topo = Join(data, options={"shared_coords": False}).to_dict()
 
-    assert topo["junctions"] == []
+    assert len(topo["junctions"]) == 0
 
 
 # when a line ABACD self-intersects with its start, there are no junctions
@@ -914,7 +916,7 @@ def test_join_shared_paths_line_ABACD_self_intersects_with_middle():
     }
     topo = Join(data, options={"shared_coords": False}).to_dict()
 
-    assert topo["junctions"] == []
+    assert len(topo["junctions"]) == 0
 
 
 # when a line ABCDBD self-intersects with its end, there are no junctions
@@ -927,7 +929,7 @@ def test_join_shared_paths_line_ABCDBD_self_intersects_with_end():
     }
     topo = Join(data, options={"shared_coords": False}).to_dict()
 
-    assert topo["junctions"] == []
+    assert len(topo["junctions"]) == 0
 
 
 # when an old line ABCDBE self-intersects and shares a point B, there is
@@ -942,7 +944,7 @@ def test_join_shared_paths_line_ABCDB_self_intersects():
     }
     topo = Join(data, options={"shared_coords": False}).to_dict()
 
-    assert topo["junctions"] == []
+    assert len(topo["junctions"]) == 0
 
 
 # when a line ABCA is closed, there is no junction at A
@@ -952,7 +954,7 @@ def test_join_shared_paths_line_ABCA_is_closed():
     }
     topo = Join(data, options={"shared_coords": False}).to_dict()
 
-    assert topo["junctions"] == []
+    assert len(topo["junctions"]) == 0
 
 
 # when a ring ABCA is closed, there are no junctions
@@ -962,7 +964,7 @@ def test_join_shared_paths_ring_ABCA_is_closed():
     }
     topo = Join(data, options={"shared_coords": False}).to_dict()
 
-    assert topo["junctions"] == []
+    assert len(topo["junctions"]) == 0
 
 
 # exact duplicate rings ABCA & ABCA share the arc ABCA, but contain no junctions
@@ -973,7 +975,7 @@ def test_join_shared_paths_exact_duplicate_rings_ABCA_ABCA_share_ABCA():
     }
     topo = Join(data, options={"shared_coords": False}).to_dict()
 
-    assert topo["junctions"] == []
+    assert len(topo["junctions"]) == 0
 
 
 # reversed duplicate rings ABCA & ACBA share the arc ABCA, but contain no junctions
@@ -997,7 +999,7 @@ def test_join_shared_paths_coincident_rings_ABCA_BCAB_share_BCAB():
     }
     topo = Join(data, options={"shared_coords": False}).to_dict()
 
-    assert topo["junctions"] == []
+    assert len(topo["junctions"]) == 0
 
 
 # coincident rings ABCA & BACB share the arc BCAB, but contain no junctions
@@ -1008,7 +1010,7 @@ def test_join_shared_paths_coincident_rings_ABCA_BACB_share_BCAB():
     }
     topo = Join(data, options={"shared_coords": False}).to_dict()
 
-    assert topo["junctions"] == []
+    assert len(topo["junctions"]) == 0
 
 
 # coincident rings ABCA & DBED share the point B, but is no junction
@@ -1019,7 +1021,7 @@ def test_join_shared_paths_coincident_rings_ABCA_DBED_share_B():
     }
     topo = Join(data, options={"shared_coords": False}).to_dict()
 
-    assert topo["junctions"] == []
+    assert len(topo["junctions"]) == 0
 
 
 # coincident ring ABCA & line DBE share the point B
@@ -1030,7 +1032,7 @@ def test_join_shared_paths_coincident_ring_ABCA_and_line_DBE_share_B():
     }
     topo = Join(data, options={"shared_coords": False}).to_dict()
 
-    assert topo["junctions"] == []
+    assert len(topo["junctions"]) == 0
 
 
 def test_join_shared_paths_non_noded_intersection():
@@ -1086,3 +1088,165 @@ def test_join_multi_shared_paths_form_geometrycollection():
     topo = Join(data, options={"prequantize": False, "shared_coords": False}).to_dict()
 
     assert len(topo["junctions"]) == 2
+
+
+def test_join_hash_prequantized_equals_overlay():
+    data = geopandas.read_file("tests/files_shapefile/static_natural_earth.gpkg")
+    topo_overlay = Join(data, options={"prequantize": True}).to_dict()
+    topo_hash = Join(data, options={"prequantize": True, "join_method": "hash"})
+    topo_hash = topo_hash.to_dict()
+
+    assert len(topo_hash["junctions"]) == 318
+    assert geometry.MultiPoint(topo_hash["junctions"]).equals(
+        geometry.MultiPoint(topo_overlay["junctions"])
+    )
+
+
+def test_join_hash_rotated_reversed_duplicate_rings():
+    data = {
+        "abca": {"type": "Polygon", "coordinates": [[[0, 0], [1, 1], [2, 0], [0, 0]]]},
+        "bacb": {"type": "Polygon", "coordinates": [[[1, 1], [0, 0], [2, 0], [1, 1]]]},
+    }
+    topo = Join(data, options={"join_method": "hash"}).to_dict()
+
+    assert len(topo["junctions"]) == 0
+
+
+def test_join_hash_line_ABC_extends_line_AB():
+    data = {
+        "ab": {"type": "LineString", "coordinates": [[0, 0], [1, 0]]},
+        "abc": {"type": "LineString", "coordinates": [[0, 0], [1, 0], [2, 1]]},
+    }
+    topo = Join(data, options={"join_method": "hash"}).to_dict()
+
+    assert geometry.MultiPoint(topo["junctions"]).equals(
+        geometry.MultiPoint([(0.0, 0.0), (1.0, 0.0)])
+    )
+
+
+def test_join_unknown_join_method():
+    data = {"ab": {"type": "LineString", "coordinates": [[0, 0], [1, 0]]}}
+    with pytest.raises(NameError):
+        Join(data, options={"join_method": "foo"})
+
+
+def test_join_n_jobs_equals_serial():
+    data = geopandas.read_file("tests/files_shapefile/static_natural_earth.gpkg")
+    topo_serial = Join(data, options={"shared_coords": False}).to_dict()
+    topo_threads = Join(data, options={"shared_coords": False, "n_jobs": 3}).to_dict()
+
+    assert len(topo_threads["junctions"]) == 321
+    assert geometry.MultiPoint(topo_threads["junctions"]).equals(
+        geometry.MultiPoint(topo_serial["junctions"])
+    )
+
+
+# junctions on or near the borders of the tiles are found exactly once
+def test_join_tiles_equals_untiled():
+    data = geopandas.read_file("tests/files_shapefile/static_natural_earth.gpkg")
+    topo_untiled = Join(data, options={"shared_coords": False}).to_dict()
+    topo_tiled = Join(data, options={"shared_coords": False, "tiles": 5}).to_dict()
+
+    assert len(topo_tiled["junctions"]) == 321
+    assert geometry.MultiPoint(topo_tiled["junctions"]).equals(
+        geometry.MultiPoint(topo_untiled["junctions"])
+    )
+
+
+# the number of tiles must be a positive integer
+@pytest.mark.parametrize("tiles", [-2, 0, 2.5, True, "5"])
+def test_join_tiles_invalid(tiles):
+    data = {"ab": {"type": "LineString", "coordinates": [[0, 0], [1, 0]]}}
+    with pytest.raises(ValueError):
+        Join(data, options={"tiles": tiles})
+
+
+# junctions are returned as a 2d coordinate array for each join method
+@pytest.mark.parametrize("options", [{"shared_coords": False}, {"shared_coords": True}])
+def test_join_junctions_coordinate_array(options):
+    data = {
+        "abc": {"type": "LineString", "coordinates": [[0, 0], [1, 0], [2, 0]]},
+        "dbe": {"type": "LineString", "coordinates": [[1, 1], [1, 0], [2, 0], [3, 1]]},
+    }
+    topo = Join(data, options=options).to_dict()
+
+    assert topo["junctions"].shape == (2, 2)
+    assert sorted(topo["junctions"].tolist()) == [[1.0, 0.0], [2.0, 0.0]]
+
+
+# network mode nodes a collinear overlap without shared vertices before hashing
+@pytest.mark.skipif(not SHAPELY_GE_20, reason="requires shapely 2")
+def test_join_network_overlap_without_shared_vertex():
+    data = {
+        "abc": {"type": "LineString", "coordinates": [[0, 0], [1, 0], [2, 0]]},
+        "ad": {"type": "LineString", "coordinates": [[0.5, 0], [3, 0], [3, 1]]},
+    }
+    topo_network = Join(data, options={"join_method": "network"}).to_dict()
+    topo_overlay = Join(data, options={"join_method": "overlay"}).to_dict()
+
+    assert sorted(topo_network["junctions"].tolist()) == [[0.5, 0.0], [2.0, 0.0]]
+    assert sorted(topo_overlay["junctions"].tolist()) == [[0.5, 0.0], [2.0, 0.0]]
+
+
+# polygon boundaries passed as linestrings give the same junctions in network mode
+@pytest.mark.skipif(not SHAPELY_GE_20, reason="requires shapely 2")
+def test_join_network_equals_overlay():
+    data = geopandas.read_file("tests/files_shapefile/static_natural_earth.gpkg")
+    data = geopandas.GeoDataFrame(geometry=data.boundary.explode(index_parts=False))
+    topo_network = Join(
+        data, options={"prequantize": False, "join_method": "network"}
+    ).to_dict()
+    topo_overlay = Join(
+        data, options={"prequantize": False, "join_method": "overlay"}
+    ).to_dict()
+
+    assert len(topo_network["junctions"]) == 321
+    assert geometry.MultiPoint(topo_network["junctions"]).equals(
+        geometry.MultiPoint(topo_overlay["junctions"])
+    )
+
+
+# couples of crossing linestrings without shared segment are pruned in overlay mode
+def test_join_overlay_prunes_crossing_combs(caplog):
+    caplog.set_level("DEBUG")
+    data = {
+        "ab": {"type": "LineString", "coordinates": [[0, 0], [2, 2]]},
+        "cd": {"type": "LineString", "coordinates": [[0, 2], [2, 0]]},
+        "ef": {"type": "LineString", "coordinates": [[0.5, 0.5], [1.5, 1.5]]},
+    }
+    topo = Join(data, options={"join_method": "overlay"})
+
+    assert topo._pruned_combs == 2
+    assert "rejected 2 couples of linestrings" in caplog.text
+    assert sorted(topo.to_dict()["junctions"].tolist()) == [
+        [0.5, 0.5],
+        [1.5, 1.5],
+    ]
+
+
+# without shapely 2 the network join method falls back to overlay
+def test_join_network_falls_back_to_overlay(monkeypatch, caplog):
+    monkeypatch.setattr("topojson.core.join.SHAPELY_GE_20", False)
+    data = {
+        "abc": {"type": "LineString", "coordinates": [[0, 0], [1, 0], [2, 0]]},
+        "ad": {"type": "LineString", "coordinates": [[0.5, 0], [3, 0], [3, 1]]},
+    }
+    topo = Join(data, options={"join_method": "network"}).to_dict()
+
+    assert "using `overlay` instead" in caplog.text
+    assert sorted(topo["junctions"].tolist()) == [[0.5, 0.0], [2.0, 0.0]]
+
+
+# without prequantization the auto join method keeps the junctions of overlay
+def test_join_auto_unquantized_lines_equals_overlay():
+    data = geopandas.read_file("tests/files_geojson/naturalearth_lowres.geojson")
+    data = geopandas.GeoDataFrame(geometry=data.boundary)
+    topo_auto = Join(data, options={"prequantize": False}).to_dict()
+    topo_overlay = Join(
+        data, options={"prequantize": False, "join_method": "overlay"}
+    ).to_dict()
+
+    assert len(topo_auto["junctions"]) == 303
+    assert sorted(topo_auto["junctions"].tolist()) == sorted(
+        topo_overlay["junctions"].tolist()
+    )
@@ -1,5 +1,7 @@
 import numpy as np
+import pytest
 import topojson.ops
+from shapely import geometry
 
 
 def test_ops_remove_colinear_points():
@@ -11,3 +13,256 @@ def test_ops_remove_colinear_points():
     test = np.array([[0, 0], [1, 1], [0, 2]])
     result = topojson.ops.remove_collinear_points(test)
     assert result.tolist() == test.tolist()
+
+
+def test_ops_shared_coords_junctions():
+    lines = [
+        geometry.LineString([[0, 0], [1, 0], [2, 0]]),
+        geometry.LineString([[0, 1], [1, 0], [2, 0], [3, 1]]),
+    ]
+    result = topojson.ops.shared_coords_junctions(lines)
+    assert isinstance(result, np.ndarray)
+    assert result.tolist() == [[1.0, 0.0], [2.0, 0.0]]
+
+
+def test_ops_chunk_by_cost():
+    costs = np.array([1.0, 50.0, 1.0, 2.0, 1.0, 1.0])
+    chunks = topojson.ops.chunk_by_cost(costs, target=3)
+
+    assert chunks[0].tolist() == [1]
+    assert sorted(np.concatenate(chunks).tolist()) == list(range(len(costs)))
+
+
+# the vertex at (1, 0) is inserted in the segment of the first linestring
+@pytest.mark.skipif(not topojson.ops.SHAPELY_GE_20, reason="requires shapely 2")
+def test_ops_node_linestrings():
+    lines = [
+        geometry.LineString([[0, 0], [2, 0], [2, 2]]),
+        geometry.LineString([[1, 1], [1, 0], [3, 0]]),
+    ]
+    noded = topojson.ops.node_linestrings(lines)
+
+    assert noded[0].equals(lines[0])
+    assert list(noded[0].coords) == [(0, 0), (1, 0), (2, 0), (2, 2)]
+    assert list(noded[1].coords) == [(1, 1), (1, 0), (2, 0), (3, 0)]
+
+
+# (1, 0) and (5.5, 5.5) are inserted, (2, 0) exists and (1.5, 1) is not on a line
+def test_ops_insert_junctions():
+    lines = [
+        geometry.LineString([[0, 0], [2, 0], [2, 2]]),
+        geometry.LineString([[5, 5], [6, 6]]),
+    ]
+    junctions = np.array([[1.0, 0.0], [2.0, 0.0], [1.5, 1.0], [5.5, 5.5]])
+    lines_xy, splitters = topojson.ops.insert_junctions(lines, junctions)
+
+    assert lines_xy[0].tolist() == [[0, 0], [1, 0], [2, 0], [2, 2]]
+    assert lines_xy[1].tolist() == [[5, 5], [5.5, 5.5], [6, 6]]
+    assert splitters[0].tolist() == [[1.0, 0.0], [2.0, 0.0]]
+
+
+# junctions are matched to the vertices by their ids in the shared table, a
+# junction within tolerance of a vertex is reported on that vertex
+def test_ops_insert_junctions_vertex_ids():
+    lines = [geometry.LineString([[0, 0], [2, 0], [2, 2]])]
+    vertex_ids, vertices = topojson.ops.linestring_vertex_ids(lines)
+    junctions = np.array([[2.0, 0.0], [2.0, 1e-12], [1.0, 0.0]])
+    junction_ids, vertices = topojson.ops.register_vertices(junctions, vertices)
+    lines_xy, splitters = topojson.ops.insert_junctions(
+        lines, junctions, vertex_ids=vertex_ids, junction_ids=junction_ids
+    )
+
+    assert lines_xy[0].tolist() == [[0, 0], [1, 0], [2, 0], [2, 2]]
+    assert splitters[0].tolist() == [[2.0, 0.0], [2.0, 0.0], [1.0, 0.0]]
+
+
+# a shared path crossing the border of two windows is merged back into one line
+def test_ops_intersect_windowed():
+    ring = geometry.LineString([[x, 0] for x in range(20)] + [[19, 5], [0, 5], [0, 0]])
+    line = geometry.LineString([[3, 1], [3, 0], [4, 0], [5, 0], [6, 0], [6, -1]])
+    result = topojson.ops.intersect_windowed(ring, line, window_size=4)
+
+    assert result.equals(geometry.LineString([[3, 0], [6, 0]]))
+    assert result.coords[0] in [(3, 0), (6, 0)] and len(result.coords) == 4
+
+
+def test_ops_select_unique_combs():
+    lines = [
+        geometry.LineString([[0, 0], [1, 0]]),
+        geometry.LineString([[5, 5], [6, 6]]),
+        geometry.LineString([[1, 0], [2, 0]]),
+        geometry.LineString([[0, 0], [2, 0]]),
+    ]
+    combs, _ = topojson.ops.select_unique_combs(lines)
+
+    assert combs.tolist() == [[0, 2], [0, 3], [2, 3]]
+
+
+# a crossing without shared vertices and a reversed duplicate are both rejected,
+# while a collinear overlap without common vertex is kept
+def test_ops_prefilter_combs():
+    lines = [
+        geometry.LineString([[0, 0], [2, 0]]),
+        geometry.LineString([[1, 0], [3, 0]]),
+        geometry.LineString([[0, 1], [2, -1]]),
+        geometry.LineString([[2, 0], [0, 0]]),
+    ]
+    combs = topojson.ops.prefilter_combs(lines, [[0, 1], [0, 2], [0, 3]])
+
+    assert combs.tolist() == [[0, 1]]
+
+
+# known coordinates keep their id, unknown coordinates are appended to the table
+def test_ops_register_vertices():
+    ids, vertices = topojson.ops.coords_ids(np.array([[1.0, 2.0], [0.0, 0.0]]))
+    result, vertices = topojson.ops.register_vertices(
+        np.array([[0.0, 0.0], [3.0, 1.0], [1.0, 2.0], [3.0, 1.0]]), vertices
+    )
+
+    assert ids.tolist() == [1, 0]
+    assert result.tolist() == [0, 2, 1, 2]
+    assert vertices.tolist() == [[0.0, 0.0], [1.0, 2.0], [3.0, 1.0]]
+
+
+# each delta-encoded arc is dequantized from its own first coordinate
+def test_ops_dequantize_ragged():
+    arcs = [[[1, 2], [3, 4], [-1, 0]], [[5, 5]], [[2, 2], [1, 1]]]
+    coords, offsets = topojson.ops.ragged_from_arcs(arcs)
+    coords = topojson.ops.dequantize_ragged(coords, offsets, [2, 1], [10, 0])
+    result = topojson.ops.arcs_from_ragged(coords, offsets)
+
+    assert offsets.tolist() == [0, 3, 4, 6]
+    assert [arc.tolist() for arc in result] == [
+        [[12, 2], [18, 6], [16, 6]],
+        [[20, 5]],
+        [[14, 2], [16, 3]],
+    ]
+
+
+# values mapped to a negative index are removed from their row
+def test_ops_remap_csr():
+    indptr, indices = topojson.ops.csr_from_lists([[0, 1], [2], [3, 1]])
+    indptr, indices = topojson.ops.remap_csr(indptr, indices, np.array([0, 1, -1, 0]))
+
+    assert topojson.ops.lists_from_csr(indptr, indices) == [[0, 1], [], [0, 1]]
+
+
+# the ring is rotated to its first split vertex and split on the second one, the
+# collinear vertex (1, 0) of the open linestring is removed
+def test_ops_split_lines():
+    ring = [[0, 0], [2, 0], [2, 2], [0, 2], [0, 0]]
+    line = [[0, 0], [1, 0], [2, 0], [3, 1]]
+    coords, offsets = topojson.ops.ragged_from_arcs([ring, line])
+    split_mask = np.array([0, 1, 0, 1, 0, 0, 0, 0, 0], dtype=bool)
+    is_ring = np.array([True, False])
+    coords, offsets, no_pieces = topojson.ops.split_lines(
+        coords, offsets, split_mask, is_ring
+    )
+    pieces = topojson.ops.arcs_from_ragged(coords, offsets)
+
+    assert no_pieces.tolist() == [2, 1]
+    assert [piece.tolist() for piece in pieces] == [
+        [[2, 0], [2, 2], [0, 2]],
+        [[0, 2], [0, 0], [2, 0]],
+        [[0, 0], [2, 0], [3, 1]],
+    ]
+
+
+# reversed and rotated arcs are duplicates, an arc with the same coordinates in a
+# different order is not
+def test_ops_find_duplicates():
+    arcs = [
+        np.array([[0, 0], [1, 0], [1, 1], [0, 0]]),
+        np.array([[0, 0], [1, 0], [2, 0]]),
+        np.array([[1, 1], [0, 0], [1, 0], [1, 1]]),
+        np.array([[2, 0], [1, 0], [0, 0]]),
+        np.array([[1, 0], [0, 0], [2, 0]]),
+        np.array([[1, 0], [1, 1], [0, 0], [1, 0]]),
+    ]
+    result = topojson.ops.find_duplicates(arcs)
+
+    assert result.tolist() == [[3, 1], [5, 2], [5, 0]]
+
+
+def test_ops_find_duplicates_linestrings():
+    lines = [
+        geometry.LineString([[0, 0], [1, 0], [2, 0]]),
+        geometry.LineString([[2, 0], [1, 0], [0, 0]]),
+    ]
+    result = topojson.ops.find_duplicates(lines, type="linestring")
+
+    assert result.tolist() == [[1, 0]]
+
+
+# a ring passing its smallest vertex twice is compared over all rotations
+def test_ops_canonical_arcs():
+    eight = [[0, 0], [1, 1], [2, 0], [0, 0], [-1, 1], [-2, 0], [0, 0]]
+    rotated = eight[3:] + eight[1:4]
+    coords, offsets = topojson.ops.ragged_from_arcs([eight, rotated[::-1]])
+    ids, _ = topojson.ops.coords_ids(coords)
+    canon_ids, canon_offsets, is_closed = topojson.ops.canonical_arcs(ids, offsets)
+
+    assert is_closed.tolist() == [True, True]
+    assert canon_offsets.tolist() == [0, 6, 12]
+    assert canon_ids[:6].tolist() == canon_ids[6:].tolist()
+
+
+# all equal arcs are labelled by the highest index of their group
+def test_ops_duplicate_labels():
+    arcs = [
+        np.array([[0, 0], [1, 0]]),
+        np.array([[5, 5], [6, 6]]),
+        np.array([[1, 0], [0, 0]]),
+        np.array([[0, 0], [1, 0]]),
+    ]
+    labels = topojson.ops.duplicate_labels(arcs)
+
+    assert labels.tolist() == [3, 1, 3, 3]
+    assert topojson.ops.pairs_from_labels(labels).tolist() == [[3, 2], [3, 0]]
+
+
+# arcs 0, 1 and 2 meet at nodes touched by no other arc, node 3 is touched by arcs
+# 2, 3 and 4 and stays a junction
+def test_ops_arc_chains():
+    start_nodes = np.array([0, 2, 2, 3, 3])
+    end_nodes = np.array([1, 1, 3, 4, 5])
+    indptr, indices = topojson.ops.csr_from_lists([[0, 1, 2, 3], [4]])
+    chains, backward = topojson.ops.arc_chains(start_nodes, end_nodes, indptr, indices)
+
+    assert [chain.tolist() for chain in chains] == [[0, 1, 2]]
+    assert [bw.tolist() for bw in backward] == [[False, True, False]]
+
+
+# a chain starting at an arc that is traversed backwards is reversed
+def test_ops_arc_chains_direction():
+    indptr, indices = topojson.ops.csr_from_lists([[1, 0]])
+    chains, backward = topojson.ops.arc_chains(
+        np.array([1, 0]), np.array([2, 1]), indptr, indices
+    )
+
+    assert [chain.tolist() for chain in chains] == [[1, 0]]
+    assert [bw.tolist() for bw in backward] == [[False, False]]
+
+
+# the last and the first arc of a ring are stitched as well, node 1 is touched by
+# arc 3 and stays a junction, a ring without junctions becomes a single chain
+def test_ops_arc_chains_rings():
+    start_nodes = np.array([0, 1, 2, 1, 6, 7, 8])
+    end_nodes = np.array([1, 2, 0, 5, 7, 8, 6])
+    indptr, indices = topojson.ops.csr_from_lists([[0, 1, 2], [3], [4, 5, 6]])
+    chains, backward = topojson.ops.arc_chains(
+        start_nodes, end_nodes, indptr, indices, is_ring=[True, False, True]
+    )
+
+    assert [chain.tolist() for chain in chains] == [[1, 2, 0], [4, 5, 6]]
+    assert [bw.tolist() for bw in backward] == [[False] * 3, [False] * 3]
+
+
+# the signed areas of the arcs of a ring add up to the signed area of the ring
+def test_ops_arc_signed_areas():
+    ring = np.array([[0, 0], [2, 0], [2, 2], [0, 2], [0, 0]], dtype=float)
+    coords, offsets = topojson.ops.ragged_from_arcs([ring[:3], ring[2:]])
+    areas = topojson.ops.arc_signed_areas(coords, offsets)
+
+    assert areas.tolist() == [2.0, 2.0]
+    assert areas.sum() == topojson.ops.signed_area(ring)
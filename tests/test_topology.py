@@ -96,7 +96,7 @@ def test_topology_winding_order_TopoOptions():
     topo = topojson.Topology(data, winding_order="CW_CCW").to_dict(options=True)
 
     assert len(topo["objects"]) == 1
-    assert len(topo["options"]) == 12
+    assert len(topo["options"]) == 16
 
 
 # test winding order using kwarg variables
@@ -106,7 +106,7 @@ def test_topology_winding_order_kwarg_vars():
     topo = topojson.Topology(data, winding_order="CW_CCW").to_dict(options=True)
 
     assert len(topo["objects"]) == 1
-    assert len(topo["options"]) == 12
+    assert len(topo["options"]) == 16
 
 
 def test_topology_computing_topology():
@@ -700,6 +700,44 @@ def test_topology_write_multiple_object_json_dict():
 
     assert len(topo_dict["objects"]) == 2
 
+# the river is only cut by the admin areas when both objects share topology
+@pytest.mark.parametrize(
+    "topology_scope, no_arcs",
+    [
+        (None, 5),
+        ("all", 5),
+        ("object", 4),
+        ([["admin"], ["rivers"]], 4),
+        ([["admin", "rivers"]], 5),
+    ],
+)
+def test_topology_scope_across_objects(topology_scope, no_arcs):
+    admin = geopandas.GeoDataFrame(
+        geometry=[geometry.box(0, 0, 1, 1), geometry.box(1, 0, 2, 1)]
+    )
+    rivers = geopandas.GeoDataFrame(geometry=[geometry.LineString([(1, -1), (1, 2)])])
+    topo = topojson.Topology(
+        data=[admin, rivers],
+        object_name=["admin", "rivers"],
+        topology_scope=topology_scope,
+        prequantize=False,
+    ).to_dict()
+
+    assert len(topo["arcs"]) == no_arcs
+
+
+# groups of the topology scope may only refer to objects of the input
+def test_topology_scope_unknown_object():
+    admin = geopandas.GeoDataFrame(geometry=[geometry.box(0, 0, 1, 1)])
+    rivers = geopandas.GeoDataFrame(geometry=[geometry.LineString([(1, -1), (1, 2)])])
+    with pytest.raises(ValueError):
+        topojson.Topology(
+            data=[admin, rivers],
+            object_name=["admin", "rivers"],
+            topology_scope=[["admin"], ["zzz"]],
+        )
+
+
 def test_topology_ignore_index_true_geojson():
     
     from geojson import Feature, FeatureCollection, Polygon
@@ -719,3 +757,26 @@ def test_topology_ignore_index_true_geojson():
 
     index = [obj["id"] for obj in geom]
     assert index == ["feature_0","feature_1"]
+
+
+# the arcs of a ring are also stitched across the first vertex of the ring
+def test_topology_shared_coords_stitch_across_ring_start():
+    data = geopandas.GeoDataFrame(
+        geometry=[geometry.box(4, 0, 7, 3), geometry.box(1, 0, 4, 3)]
+    )
+    topo = topojson.Topology(data, shared_coords=True, prequantize=False).to_dict()
+
+    assert len(topo["arcs"]) == 3
+
+
+# junctions of polygons with z values are matched on x and y
+def test_topology_polygons_with_z():
+    data = geopandas.GeoDataFrame(
+        geometry=[
+            geometry.Polygon([(0, 0, 1), (1, 0, 1), (1, 1, 1), (0, 1, 1)]),
+            geometry.Polygon([(1, 0, 1), (2, 0, 1), (2, 1, 1), (1, 1, 1)]),
+        ]
+    )
+    topo = topojson.Topology(data, prequantize=False).to_dict()
+
+    assert len(topo["arcs"]) == 3
@@ -1,17 +1,16 @@
-import itertools
 import pprint
 import copy
 import numpy as np
-from shapely import geometry
-from shapely.strtree import STRtree
 from .join import Join
-from ..ops import ignore_shapely2_warnings
-from ..ops import insert_coords_in_line
-from ..ops import np_array_bbox_points_line
-from ..ops import fast_split
-from ..ops import find_duplicates
-from ..ops import np_array_from_lists
-from ..ops import remove_collinear_points
+from ..ops import arcs_from_ragged
+from ..ops import insert_junctions
+from ..ops import junctions_per_line
+from ..ops import duplicate_labels
+from ..ops import csr_from_lists
+from ..ops import pairs_from_labels
+from ..ops import register_vertices
+from ..ops import ragged_from_arcs
+from ..ops import split_lines
 from ..utils import serialize_as_svg
 
 
@@ -35,7 +34,7 @@ class Cut(Join):
         object updated and expanded with
         - updated key: linestrings
         - new key: bookkeeping_duplicates
-        - new key: bookkeeping_linestrings
+        - new key: bookkeeping_linestrings (indptr and indices of the segments)
     """
 
     def __init__(self, data, options={}):
@@ -44,7 +43,8 @@ class Cut(Join):
 
         # initiation topology items
         self._duplicates = []
-        self._bookkeeping_linestrings = []
+        self._duplicate_labels = np.empty(0, dtype=np.int64)
+        self._bookkeeping_linestrings = csr_from_lists([])
 
         # execute main function
         self.output = self._cutter(self.output)
@@ -100,72 +100,67 @@ class Cut(Join):
             object updated and expanded with
             - updated key: linestrings
             - new key: bookkeeping_duplicates
-            - new key: bookkeeping_linestrings
+            - new key: bookkeeping_linestrings (indptr and indices of the segments)
         """
 
-        if data["junctions"]:
-            # split each feature given the intersections
-            # prepare the junctions as a 2d coordinate array
-            mp = data["junctions"]
-            if isinstance(mp, geometry.Point):
-                mp = geometry.MultiPoint([mp])
-            # create spatial index on junctions
-            with ignore_shapely2_warnings():
-                tree_splitter = STRtree(mp)
-            lines_split = []
-
-            # create dict with original geometry type per linestring
-            lines_object_types = self._get_linestring_types(
-                objects=data["objects"],
-                bookkeeping_geoms=data["bookkeeping_geoms"],
-            )
+        lines_xy = [np.array(ls.coords) for ls in data["linestrings"]]
+        split_mask = np.zeros(sum(len(xy) for xy in lines_xy), dtype=bool)
+        # rings are known per linestring since the extraction
+        is_ring = np.array(self._linestring_is_ring, dtype=bool)
 
-            # junctions are only existing in coordinates of linestring
-            for index, linestring in enumerate(data["linestrings"]):
-                if self.options.shared_coords:
-                    line, splitter = np_array_bbox_points_line(
-                        linestring, tree_splitter
-                    )
-                else:
-                    line, splitter = insert_coords_in_line(linestring, tree_splitter)
-                # prev function returns None for splitter if nothing to split
-                if splitter is not None:
-                    is_ring = False
-                    if lines_object_types[index] in ["Polygon", "MultiPolygon"]:
-                        is_ring = True
-                    line_split = fast_split(line, splitter, is_ring)
-                    if isinstance(line_split, list):
-                        line_split = [
-                            remove_collinear_points(line) for line in line_split
-                        ]
-                    else:
-                        line_split = remove_collinear_points(line_split)
-                    lines_split.append(line_split)
-                else:
-                    lines_split.append(
-                        [remove_collinear_points(np.array(linestring.coords))]
-                    )
-            # flatten the splitted linestrings, create bookkeeping_geoms array
-            # and find duplicates
-            self._segments_list, bk_array = self._flatten_and_index(lines_split)
-            self._duplicates = find_duplicates(self._segments_list)
-            self._bookkeeping_linestrings = bk_array.astype(float)
+        if len(data["junctions"]):
+            # split each feature given the intersections
+            # match the junctions to all linestrings at once, objects that do not
+            # share topology are not cut by each other
+            junctions = np.asarray(data["junctions"], dtype=float)
+            if self._junction_index is not None:
+                # a junction that is found in several groups is matched per group
+                junctions = junctions[self._junction_index]
+            groups = (self._linestring_groups, self._junction_groups)
+            if self.options.shared_coords:
+                # junctions are only existing in coordinates of linestring
+                splitters = junctions_per_line(data["linestrings"], junctions, *groups)
+            else:
+                # insert junctions on the linestring where no vertex exists
+                junction_ids = self._junction_ids
+                if self._junction_index is not None:
+                    junction_ids = junction_ids[self._junction_index]
+                lines_xy, splitters = insert_junctions(
+                    data["linestrings"],
+                    junctions,
+                    *groups,
+                    vertex_ids=self._vertex_ids,
+                    junction_ids=junction_ids,
+                )
+
+            # mark the vertices that are a junction on their linestring
+            split_mask = self._split_mask(lines_xy, splitters)
+
+        # split all linestrings at once and remove collinear points of the pieces
+        if len({xy.shape[1] for xy in lines_xy}) > 1:
+            lines_xy = [xy[:, :2] for xy in lines_xy]
+        coords, offsets = ragged_from_arcs(lines_xy)
+        coords, offsets, no_pieces = split_lines(coords, offsets, split_mask, is_ring)
+        self._segments_list = arcs_from_ragged(coords, offsets)
+
+        if len(data["junctions"]):
+            # each linestring refers to a slice of the numbered segments
+            bk_indptr = np.concatenate([[0], np.cumsum(no_pieces)])
+            bk_indices = np.arange(len(self._segments_list), dtype=np.int64)
+            self._bookkeeping_linestrings = (bk_indptr, bk_indices)
         elif data["bookkeeping_geoms"]:
-            bk_array = np_array_from_lists(data["bookkeeping_geoms"]).ravel()
-            bk_array = np.expand_dims(
-                bk_array[~np.isnan(bk_array)].astype(np.int64), axis=1
-            )
-            self._segments_list = [
-                remove_collinear_points(np.array(ls.coords))
-                for ls in data["linestrings"]
-            ]
-            self._duplicates = find_duplicates(self._segments_list)
-            self._bookkeeping_linestrings = bk_array
-        else:
-            self._segments_list = [
-                remove_collinear_points(np.array(ls.coords))
-                for ls in data["linestrings"]
-            ]
+            # each linestring is a single segment
+            _, bk_indices = csr_from_lists(data["bookkeeping_geoms"])
+            bk_indptr = np.arange(len(bk_indices) + 1)
+            self._bookkeeping_linestrings = (bk_indptr, bk_indices)
+
+        if len(data["junctions"]) or data["bookkeeping_geoms"]:
+            # label each segment by the highest index of the segments it is equal to,
+            # the segments are compared by the ids of their vertices
+            segment_ids, self._vertices = register_vertices(coords, self._vertices)
+            self._duplicate_labels = duplicate_labels(self._segments_list, segment_ids)
+            self._duplicates = pairs_from_labels(self._duplicate_labels)
+
         # prepare to return object
         data["linestrings"] = self._segments_list
         data["bookkeeping_duplicates"] = self._duplicates
@@ -173,87 +168,34 @@ class Cut(Join):
 
         return data
 
-    def _get_linestring_types(
-        self, objects, bookkeeping_geoms, bookkeeping_linestrings=None
-    ) -> dict:
-        """
-        Returns the original geometry type for each linestring.
-
-        Parameters
-        ----------
-        objects : list
-            list of original objects that contains a list of arcs for each geometry.
-        bookkeeping_geoms : list
-            list of arc-linestrings for each arc in the objects list.
-        bookkeeping_linestrings : numpy array, optional
-            array with for each arc-linestring the corresponding linestrings that were
-            constructed after splitting them on junctions. Defaults to None.
-
-        Returns
-        -------
-        dict :
-            dict with for each data["linestrings"] index the geometry type of
-            the object the linestring originated from.
+    def _split_mask(self, lines_xy, splitters):
         """
-        # create dict with original geometry type per linestring
-        def recurse_geometries(object):
-            # If object is not a list, make it a list to be able to loop
-            if not isinstance(object, list):
-                object = [object]
-            # Loop over children of object
-            for object_child in object:
-                # Depending on input format there is one or more geometry in an object
-                if "geometries" in object_child:
-                    geometries = object_child["geometries"]
-                    recurse_geometries(geometries)
-                elif object_child["type"] != "Point":
-                    # For non-Point geometries, loop over arcs
-                    for arc_id in object_child["arcs"]:
-                        # Find the linestrings for the arc via bookkeeping_geoms
-                        for arc_line_id in bookkeeping_geoms[arc_id]:
-                            if bookkeeping_linestrings is None:
-                                arc_lines = [arc_line_id]
-                            else:
-                                arc_lines = bookkeeping_linestrings[arc_line_id]
-                            for linestring_id in arc_lines:
-                                if linestring_id >= 0:
-                                    linestring_object_types[
-                                        linestring_id
-                                    ] = object_child["type"]
-
-        linestring_object_types = {}
-        for object_key in objects:
-            recurse_geometries(objects[object_key])
-        return linestring_object_types
-
-    def _flatten_and_index(self, slist):
-        """
-        Function to create a flattened list of splitted linestrings and create a
-        numpy array of the bookkeeping_geoms for tracking purposes.
+        Returns for each vertex of all linestrings if it is one of the junctions on
+        its linestring. The vertices and the junctions are matched by their ids in
+        the table of vertices, vertices that are not in the table yet are added.
 
         Parameters
         ----------
-        slist : list of LineString
-            list of splitted LineStrings
+        lines_xy : list of numpy.array
+            coordinates of each linestring
+        splitters : list of numpy.array
+            coordinates of the junctions on each linestring
 
         Returns
         -------
-        list
-            segment_list flattens the nested LineString in slist
         numpy.array
-            array_bk is a bookkeeping array with index values to each LineString
+            boolean array, True for each vertex on which its linestring is split
         """
 
-        # flatten
-        segment_list = list(itertools.chain(*slist))
-        # create slice pairs
-        segment_idx = list(itertools.accumulate([len(geom) for geom in slist]))
-        slice_pair = [
-            (segment_idx[idx - 1] if idx >= 1 else 0, current)
-            for idx, current in enumerate(segment_idx)
-        ]
-        # index array
-        list_bk = [range(len(segment_list))[s[0] : s[1]] for s in slice_pair]
-        array_bk = np_array_from_lists(list_bk)
-
-        return segment_list, array_bk
+        # register the vertices and the junctions first, so both keys are built
+        # from the same number of vertices
+        ids, line_idx = [], []
+        for nested_xy in [lines_xy, splitters]:
+            flat_ids, self._vertices = register_vertices(
+                np.concatenate(nested_xy), self._vertices
+            )
+            lengths = [len(xy) for xy in nested_xy]
+            ids.append(flat_ids)
+            line_idx.append(np.repeat(np.arange(len(nested_xy)), lengths))
+        keys = [idx * len(self._vertices) + flat for idx, flat in zip(line_idx, ids)]
+        return np.isin(keys[0], keys[1])
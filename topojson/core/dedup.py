@@ -1,13 +1,11 @@
 import copy
 import pprint
 import numpy as np
-from shapely import geometry
-from shapely.ops import linemerge
 from .cut import Cut
-from ..ops import asvoid
-from ..ops import map_values
-from ..ops import lists_from_np_array
-from ..ops import cart
+from ..ops import arc_chains
+from ..ops import register_vertices
+from ..ops import lists_from_csr
+from ..ops import remap_csr
 from ..utils import serialize_as_svg
 
 
@@ -22,6 +20,7 @@ class Dedup(Cut):
 
         # initiation topology items
         self._idx_merged_dups = []
+        self._is_shared_arc = np.zeros(0, dtype=bool)
 
         # execute main function of Dedup
         self.output = self._deduper(self.output)
@@ -65,239 +64,143 @@ class Dedup(Cut):
         5. hashmap
         """
 
-        # deduplicate equal geometries
-        # create numpy array from bookkeeping_geoms variable for numerical computation
-        if len(data["bookkeeping_linestrings"]):
-            array_bk = np.vstack(data["bookkeeping_linestrings"])
-        else:
-            array_bk = np.array([])
-        array_bk_sarcs = None
+        # deduplicate equal geometries, each arc is labelled by the arc it is kept as
+        # the bookkeeping of linestrings is a CSR structure of the arcs per linestring
+        indptr, indices = data["bookkeeping_linestrings"]
+        is_shared = np.zeros(len(data["linestrings"]), dtype=bool)
         if len(data["bookkeeping_duplicates"]):
-            array_bk, array_bk_sarcs = self._deduplicate(
-                data["bookkeeping_duplicates"], data["linestrings"], array_bk
+            data["linestrings"], indptr, indices, is_shared = self._pop_arcs(
+                self._duplicate_labels, data["linestrings"], indptr, indices
             )
 
-        # apply a shapely linemerge to merge all contiguous line-elements
-        # first create a mask for shared arcs to select only non-duplicates
-        mask = np.isin(array_bk, array_bk_sarcs)
-        array_bk_ndp = copy.deepcopy(array_bk.astype(float))
-
-        # only do merging of arcs if there are contiguous arcs in geoms
-        if array_bk_ndp[mask].size != 0:
-            # make sure the idx of shared arcs are set to np.nan
-            array_bk_ndp[mask] = np.nan
-
-            # slice array_bk_ndp for geoms (rows) containing np.nan values
-            slice_idx = np.all(~np.isnan(array_bk_ndp)[:, [0, -1]], axis=1)
-            sliced_array_bk_ndp = array_bk_ndp[slice_idx]
-
-            if sliced_array_bk_ndp.shape[1] > 1:
-                # apply linemerge on geoms containing contiguous arcs and collect idx
-                idx_merged_dups = self._merge_contiguous_arcs(data, sliced_array_bk_ndp)
-                # use deduplicate as proxy-function for merged arcs index bookkeeping
-                if idx_merged_dups is not None:
-                    array_bk, array_bk_sarcs = self._pop_merged_arcs(
-                        idx_merged_dups, data["linestrings"], array_bk
-                    )
+        # stitch chains of arcs that are always used together into a single arc
+        if len(indices) > 1:
+            merged_labels = self._merge_contiguous_arcs(data, indptr, indices)
+            # the merged arcs are popped and dropped from the bookkeeping
+            if merged_labels is not None:
+                popped = self._pop_arcs(
+                    merged_labels,
+                    data["linestrings"],
+                    indptr,
+                    indices,
+                    drop_popped=True,
+                )
+                data["linestrings"], indptr, indices, is_shared = popped
 
         # prepare to return object
         del data["bookkeeping_linestrings"]
-        data["bookkeeping_arcs"] = lists_from_np_array(array_bk)
+        data["bookkeeping_arcs"] = lists_from_csr(indptr, indices)
+        # the shared arcs are also kept as a mask indexed by arc, for simple lookups
         if len(data["bookkeeping_duplicates"]):
-            data["bookkeeping_shared_arcs"] = array_bk_sarcs.astype(np.int64).tolist()
+            self._is_shared_arc = is_shared
             data["bookkeeping_duplicates"] = []
         else:
-            data["bookkeeping_shared_arcs"] = []
+            self._is_shared_arc = np.zeros(len(data["linestrings"]), dtype=bool)
+        data["bookkeeping_shared_arcs"] = np.flatnonzero(self._is_shared_arc).tolist()
 
         return data
 
-    def _find_merged_linestring(self, data, no_ndp_arcs, ndp_arcs, ndp_arcs_bk):
-        """
-        Function to find the index of LineString in a MultiLineString object which
-        contains merged LineStrings.
-
-        Parameters
-        ----------
-        data : dict
-            object that contains the 'linestrings'
-        no_ndp_arcs : int
-            number of non-duplicate arcs
-        ndp_arcs : array
-            array containing index values of the related arcs
-
-        Returns
-        -------
-        np.array
-            combinations of index of LineString that contains merged LineStrings
-        """
-
-        for segment_idx in range(no_ndp_arcs):
-            # use isin function as proxy for contains
-            merged_arcs_bool = [
-                np.isin(
-                    asvoid(data["linestrings"][i]),
-                    asvoid(ndp_arcs.geoms[segment_idx].coords),
-                ).any()
-                for i in ndp_arcs_bk
-            ]
-            count_merged_arcs = merged_arcs_bool.count(True)
-            if count_merged_arcs >= 2:
-                merged_arcs = ndp_arcs_bk[merged_arcs_bool]
-                # create dedup pairs of merged arcs
-                merged_dedups = cart(merged_arcs)
-                return segment_idx, merged_dedups
-
-    def _deduplicate(self, bk_dups, linestring_list, array_bk):
+    def _pop_arcs(self, labels, linestring_list, indptr, indices, drop_popped=False):
         """
-        Function to deduplicate items
+        Function that pops the arcs that are not their own label and aligns the
+        bookkeeping of the linestrings with the remaining arcs.
 
         Parameters
         ----------
-        bk_dups : numpy.ndarray
-            array containing pair of indexes that refer to duplicate linestrings.
+        labels : numpy.ndarray
+            for each arc the index of the arc it is a duplicate of or is merged
+            into, or its own index if it is kept.
         linestring_list : list of shapely.geometry.LineStrings
-            list of linestrings from which items will be removed.
-        array_bk : numpy.ndarray
-            array used for bookkeeping of linestrings.
+            list of arcs of which the popped arcs are left out.
+        indptr : numpy.ndarray
+            pointers to the arcs of each linestring in indices.
+        indices : numpy.ndarray
+            arcs of all linestrings.
+        drop_popped : bool, optional
+            if True, the popped arcs are removed from the bookkeeping, as for
+            merged arcs. Otherwise they are replaced by their label, as for
+            duplicates. Default is False.
 
         Returns
         -------
+        list of shapely.geometry.LineStrings
+            new list of arcs without the popped arcs
         numpy.ndarray
-            new array of bookkeeping linestrings
+            new pointers to the arcs of each linestring
         numpy.ndarray
-            bookkeeping array of shared arcs
+            new arcs of all linestrings
+        numpy.ndarray
+            boolean array, True for each arc that is shared
         """
-        # guarantee that first column contain higher values than second column
-        bk_dups.sort(axis=1)
-        bk_dups = bk_dups[:, ::-1]
-
-        # define arrays from which the indices can be kept and popped
-        vals2keep = bk_dups[:, 0]
-        vals2pop = bk_dups[:, 1]
-
-        # remove duplicate linestrings (loop over indices backwards to avoid popping
-        # subsequent indices)
-        for idx in sorted(vals2pop, reverse=True):
-            del linestring_list[idx]
-
-        # prepare bookkeeping array, add +1 so NaN can be 0 and array only contains
-        # positive integers
-        arr = array_bk + 1
-        arr[np.isnan(arr)] = 0
-        arr = arr.astype(np.int64)
-
-        # replace duplicates by single values, add +1 since NaNs are on 0
-        arr_map = map_values(arr, vals2pop + 1, vals2keep + 1)
 
-        # popped indices changes the bookkeeping, align decremented indices
-        # add +1 since NaNs are on 0
-        arr_bin = np.digitize(arr_map, sorted(vals2pop + 1), right=False)
-        arr_new = arr_map - arr_bin
+        # map the popped indices and align the indices that are decremented by the
+        # popped indices
+        index_map, is_kept = self._index_map(labels, drop_popped=drop_popped)
+        indptr, indices = remap_csr(indptr, indices, index_map)
 
-        # set 0 to nan and subtract -1
-        arr_new = arr_new.astype(float)
-        arr_new[arr_new == 0] = np.nan
-        arr_new -= 1
+        # keep the remaining linestrings in a new list in a single pass
+        linestring_list = [linestring_list[idx] for idx in np.flatnonzero(is_kept)]
 
-        # collect new indices of shared arcs
-        u, c = np.unique(arr_new[~np.isnan(arr_new)], return_counts=True)
-        arr_bk_sarcs = u[c > 1]
+        # arcs used more than once are shared
+        is_shared = np.bincount(indices, minlength=len(linestring_list)) > 1
+        return linestring_list, indptr, indices, is_shared
 
-        return arr_new, arr_bk_sarcs
-
-    def _merge_contiguous_arcs(self, data, sliced_array_bk_ndp):
+    def _merge_contiguous_arcs(self, data, indptr, indices):
         """
-        Function that iterate over geoms that contain shared arcs and try linemerge
-        on remaining arcs. The merged contiguous arc is placed back in the 'linestrings'
-        object.
-        The arcs that can be popped are placed within the merged_arcs_idx list
+        Function that stitches the chains of arcs that meet at nodes touched by no
+        other arc and that are always used together in the same order. The arcs of
+        a chain are found at once from the graph of the arc endpoints. The stitched
+        arc is placed back in the 'linestrings' object at the highest index of its
+        chain, the other arcs of the chain can be popped.
 
         Parameters
         ----------
         data : dict
             object that contains the 'linestrings'.
-        sliced_array_bk_ndp : numpy.ndarray
-            bookkeeping array where shared linestrings are set to np.nan.
-        """
-
-        list_merged_dups = []
-        for arcs_geom_bk in sliced_array_bk_ndp:
-            # set number of arcs before trying linemerge
-            ndp_arcs_bk = arcs_geom_bk[~np.isnan(arcs_geom_bk)].astype(np.int64)
-            no_ndp_arcs_bk = len(ndp_arcs_bk)
-
-            # apply linemerge
-            ndp_arcs = linemerge([data["linestrings"][i] for i in ndp_arcs_bk])
-            if isinstance(ndp_arcs, geometry.LineString):
-                ndp_arcs = geometry.MultiLineString([ndp_arcs])
-            no_ndp_arcs = len(ndp_arcs.geoms)
-
-            # if no_ndp_arcs is different than no_ndp_arcs_bk, than a merge took place
-            # if lengths are equal, than no merge did occur and no need to solve the
-            # bookkeeping
-            if no_ndp_arcs != no_ndp_arcs_bk:
-                # get the idx of the linestring which was merged
-                idx_merged_arc, merged_dedups = self._find_merged_linestring(
-                    data, no_ndp_arcs, ndp_arcs, ndp_arcs_bk
-                )
+        indptr : numpy.ndarray
+            pointers to the arcs of each linestring in indices.
+        indices : numpy.ndarray
+            arcs of all linestrings.
 
-                # replace arc with highest index of non-duplicate arcs
-                # and collect remaining arcs as duplicates
-                idx_keep = merged_dedups[0][0]
-                data["linestrings"][idx_keep] = np.array(
-                    ndp_arcs.geoms[idx_merged_arc].coords
-                )
-                list_merged_dups.append(merged_dedups)
+        Returns
+        -------
+        numpy.ndarray or None
+            for each arc the index of the arc it is merged into, or its own index.
+            None if no arcs are merged.
+        """
 
-        if len(list_merged_dups):
-            idx_merged_dups = np.vstack(list_merged_dups)
-            return idx_merged_dups
-        else:
+        # identify the endpoints of the arcs by their vertex ids
+        endpoints = np.concatenate([arc[[0, -1], :2] for arc in data["linestrings"]])
+        node_ids, self._vertices = register_vertices(endpoints, self._vertices)
+        chains, reversed_arcs = arc_chains(
+            node_ids[0::2], node_ids[1::2], indptr, indices, self._linestring_is_ring
+        )
+        if not len(chains):
             return None
 
-    def _pop_merged_arcs(self, bk_dups, linestring_list, array_bk):
+        labels = np.arange(len(data["linestrings"]))
+        for chain, backward in zip(chains, reversed_arcs):
+            # join the arcs in order of traversal, skipping the shared vertices
+            pieces = [
+                data["linestrings"][arc][::-1] if is_bw else data["linestrings"][arc]
+                for arc, is_bw in zip(chain, backward)
+            ]
+            idx_keep = chain.max()
+            data["linestrings"][idx_keep] = np.concatenate(
+                [pieces[0]] + [piece[1:] for piece in pieces[1:]]
+            )
+            labels[chain] = idx_keep
+        return labels
+
+    def _index_map(self, labels, drop_popped=False):
         """
-        The collected indices that can be popped, since they have been merged
-        This functions looks like _deduplicate(), but is slightly different where
-        vals2pop indices are set to 0 (NaN).
+        Returns for each old arc index the new arc index once the arcs that are not
+        their own label are popped, together with the mask of kept arcs. A popped
+        index maps to the new index of its label, or to -1 if drop_popped is True.
         """
 
-        # guarantee that first column contain higher values than second column
-        bk_dups.sort(axis=1)
-        bk_dups = bk_dups[:, ::-1]
-
-        # define arrays from which the indices can be kept and popped
-        # vals2keep = bk_dups[:, 0]
-        vals2pop = bk_dups[:, 1]
-
-        # remove duplicate linestrings (loop over indices backwards to avoid popping
-        # subsequent indices)
-        for idx in sorted(vals2pop, reverse=True):
-            del linestring_list[idx]
-
-        # prepare bookkeeping array, add +1 so NaN can be 0 and array only contains
-        # positive integers
-        arr = array_bk + 1
-        arr[np.isnan(arr)] = 0
-        arr = arr.astype(np.int64)
-
-        # replace duplicates by single values, add +1 since NaNs are on 0
-        zero_array = np.zeros_like(vals2pop)
-        arr_map = map_values(arr, vals2pop + 1, zero_array)
-
-        # popped indices changes the bookkeeping, align decremented indices
-        # add +1 since NaNs are on 0
-        arr_bin = np.digitize(arr_map, sorted(vals2pop + 1), right=False)
-        arr_new = arr_map - arr_bin
-
-        # set 0 to nan and subtract -1
-        arr_new = arr_new.astype(float)
-        arr_new[arr_new == 0] = np.nan
-        arr_new -= 1
-
-        # collect new indices of shared arcs
-        u, c = np.unique(arr_new, return_counts=True)
-        arr_bk_sarcs = u[c > 1]
-        arr_bk_sarcs = arr_bk_sarcs[~np.isnan(arr_bk_sarcs)]
-
-        return arr_new, arr_bk_sarcs
+        is_kept = labels == np.arange(len(labels))
+        new_index = np.cumsum(is_kept) - 1
+        if drop_popped:
+            return np.where(is_kept, new_index, -1), is_kept
+        return new_index[labels], is_kept
@@ -59,6 +59,8 @@ class Extract(object):
         self._bookkeeping_geoms = []
         self._bookkeeping_coords = []
         self._linestrings = []
+        self._linestring_keys = []
+        self._linestring_is_ring = []
         self._coordinates = []
         self._geomcollection_counter = 0
         self._is_single = True
@@ -66,6 +68,7 @@ class Extract(object):
         self._tried_geojson = False
         self._is_multi_geom = False
         self._geom_offset = 0
+        self._has_rings = False
 
         self.output = self._extractor(data)
 
@@ -246,6 +249,8 @@ class Extract(object):
             # record index and store linestring geom
             self._bookkeeping_geoms.append([idx_ls])
             self._linestrings.append(geom)
+            self._linestring_keys.append(self._key)
+            self._linestring_is_ring.append(False)
 
             # track record in object as well
             obj = self._obj
@@ -292,6 +297,7 @@ class Extract(object):
             return self._extractor([geom])
         idx_bk = len(self._bookkeeping_geoms)
         idx_ls = len(self._linestrings)
+        self._has_rings = True
 
         # orient the outer polygon clockwise and the inner polygon counterclockwise
         # to conform TopoJSON standard (CW_CCW)
@@ -306,10 +312,14 @@ class Extract(object):
             self._bookkeeping_geoms.append(lst_idx)
             for ls in boundary.geoms:
                 self._linestrings.append(ls)
+                self._linestring_keys.append(self._key)
+                self._linestring_is_ring.append(True)
         else:
             # record index and store single linestring geom
             self._bookkeeping_geoms.append([idx_ls])
             self._linestrings.append(boundary)
+            self._linestring_keys.append(self._key)
+            self._linestring_is_ring.append(True)
         # track record in object as well
         obj = self._obj
         if "arcs" not in obj:
@@ -1,10 +1,13 @@
 import copy
 import pprint
-from itertools import chain
 import numpy as np
 from shapely import geometry
 from .dedup import Dedup
-from ..ops import is_ccw
+from ..ops import arc_signed_areas
+from ..ops import csr_from_lists
+from ..ops import lists_from_csr
+from ..ops import ragged_from_arcs
+from ..ops import register_vertices
 from ..utils import serialize_as_svg
 from ..utils import serialize_as_json
 
@@ -88,9 +91,25 @@ class Hashmap(Dedup):
         # make data available within class
         self._data = data
 
-        # resolve bookkeeping to arcs in objects, including backward check of arcs
-        # resolve bookkeeping of coordinates in objects, including delta-encoding
-        list(self._resolve_objects(["arcs", "coordinates"], self._data["objects"]))
+        # look up the vertex ids of the first and last coordinate of all arcs at once
+        # and the contribution of each arc to the signed area of the rings
+        self._arc_nodes = np.empty((0, 2), dtype=np.int64)
+        self._arc_ends = np.empty((0, 2, 2))
+        self._arc_areas = np.empty(0)
+        if data["linestrings"]:
+            coords, offsets = ragged_from_arcs(data["linestrings"])
+            ends = np.column_stack([offsets[:-1], offsets[1:] - 1]).ravel()
+            endpoints = coords[ends, :2]
+            arc_nodes, self._vertices = register_vertices(endpoints, self._vertices)
+            self._arc_nodes = arc_nodes.reshape(-1, 2)
+            self._arc_ends = endpoints.reshape(-1, 2, 2)
+            self._arc_areas = arc_signed_areas(coords, offsets)
+
+        # the object model is kept columnar: the rings of each geom and the arcs of
+        # each ring are CSR arrays, the direction of the arcs is resolved at once
+        self._geom_rings = csr_from_lists(data["bookkeeping_geoms"])
+        self._ring_arcs = self._resolve_directions(data)
+        self._ring_lists = lists_from_csr(*self._ring_arcs)
 
         resolved_data_objects = {}
         for object_ix, object_name in enumerate(self.options.object_name):
@@ -211,7 +230,7 @@ class Hashmap(Dedup):
             description of output
         """
 
-        shared_bool = np.isin(arc_ids, self._data["bookkeeping_shared_arcs"])
+        shared_bool = self._is_shared_arc[arc_ids]
         order_of_arc, split_arc_ids = self._hash_order(arc_ids, shared_bool)
 
         for idx_outer, split_arc in enumerate(split_arc_ids):
@@ -237,24 +256,18 @@ class Hashmap(Dedup):
                 if arc_idx_prev < 0:
                     arc_idx_prev = abs(arc_idx_prev) - 1
 
-                current_arc = self._data["linestrings"][arc_idx]
-                previous_arc = self._data["linestrings"][arc_idx_prev]
-
-                # get first and last coordinate of current and previous arc
-                coord_f = current_arc[0]
-                coord_l = current_arc[-1]
+                # get vertex id of first and last coordinate of current and previous arc
+                coord_f, coord_l = self._arc_nodes[arc_idx]
 
                 if not previous_arc_backwards:
-                    coords_prev = previous_arc[[0, -1]]
+                    coord_f_prev, coord_l_prev = self._arc_nodes[arc_idx_prev]
                 else:
-                    coords_prev = previous_arc[[-1, 0]]
-                coord_f_prev = coords_prev[0]
-                coord_l_prev = coords_prev[1]
+                    coord_l_prev, coord_f_prev = self._arc_nodes[arc_idx_prev]
 
                 # order 1, compare last coordinate of previous arc with first coordinate
                 # of current arc. If not equal, rotate current arc
                 if order == 1:
-                    if not np.array_equiv(coord_l_prev, coord_f):
+                    if coord_l_prev != coord_f:
                         split_arc[idx] = -(arc_idx + 1)
                         previous_arc_backwards = True
                     else:
@@ -264,23 +277,21 @@ class Hashmap(Dedup):
                 # of previous arc with the last coordinate of current arc. If not equal
                 # rotate current arc.
                 elif order == 2:
-                    if not np.array_equiv(coord_f_prev, coord_l):
+                    if coord_f_prev != coord_l:
                         split_arc[idx] = -(arc_idx + 1)
                         previous_arc_backwards = True
                     else:
                         previous_arc_backwards = False
 
                 elif order == 3:
-                    if np.array_equiv(coord_f_prev, coord_l) and not np.array_equiv(
-                        coord_l_prev, coord_f
-                    ):
+                    if coord_f_prev == coord_l and coord_l_prev != coord_f:
                         split_arc[idx - 1] = -(arc_idx_prev + 1)
                         split_arc[idx] = -(arc_idx + 1)
                         previous_arc_backwards = True
-                    elif np.array_equiv(coord_f, coord_f_prev):
+                    elif coord_f == coord_f_prev:
                         split_arc[idx - 1] = -(arc_idx_prev + 1)
                         previous_arc_backwards = False
-                    elif not np.array_equiv(coord_l_prev, coord_f):
+                    elif coord_l_prev != coord_f:
                         split_arc[idx] = -(arc_idx + 1)
                         previous_arc_backwards = True
                     else:
@@ -296,97 +307,218 @@ class Hashmap(Dedup):
         if order == 3:
             # since alignment is done based on the first two arcs, need a double-check
             # if it follows the required order of the ring
-            if self._inner and self.options.winding_order == "CCW_CW":
-                need_ccw = False
-            elif not self._inner and (
-                self.options.winding_order == "CW_CCW"
-                or self.options.winding_order is None
-            ):
-                need_ccw = False
-            else:
-                need_ccw = True
-
-            arc_ids = self._resolve_orient(arc_ids, need_ccw)
+            arc_ids = self._resolve_orient(arc_ids, self._need_ccw(self._inner))
 
         return arc_ids
 
-    def _resolve_orient(self, arcs_idx_geom, need_ccw):
-        arcs_geom = []
-        for arc_idx in arcs_idx_geom:
-            if arc_idx < 0:
-                arc = copy.copy(self._data["linestrings"][~arc_idx])
-                arc = arc[::-1]
-                arcs_geom.append(arc)
+    def _need_ccw(self, inner):
+        """
+        Returns if a ring should be counterclockwise given the winding order option
+        and if the ring is an interior ring.
+        """
+
+        if inner and self.options.winding_order == "CCW_CW":
+            return False
+        elif not inner and self.options.winding_order in ["CW_CCW", None]:
+            return False
+        return True
+
+    def _resolve_directions(self, data):
+        """
+        Function to check for the arcs of all linestrings at once if they should be
+        backward. If so, are written as -(index+1).
+
+        Non-shared arcs keep their direction. The shared arcs following a non-shared
+        arc continue the chain of arcs from it and the shared arcs before the first
+        non-shared arc are followed backwards from that arc. For linestrings with
+        only shared arcs the first two arcs are aligned and the chain continues from
+        there. Linestrings with only shared arcs that do not form a simple chain are
+        resolved one by one in `_backward_arcs()`.
+
+        Parameters
+        ----------
+        data : dict
+            object that contains the 'bookkeeping_arcs'
+
+        Returns
+        -------
+        numpy.ndarray
+            pointers to the arcs of each linestring in the arc indices
+        numpy.ndarray
+            arc indices of all linestrings, backward arcs as -(index+1)
+        """
+
+        indptr, indices = csr_from_lists(data["bookkeeping_arcs"])
+        no_rows = len(indptr) - 1
+        lengths = np.diff(indptr)
+        row = np.repeat(np.arange(no_rows), lengths)
+        position = np.arange(len(indices)) - indptr[:-1][row]
+        start, end = self._arc_nodes[indices, 0], self._arc_nodes[indices, 1]
+
+        # shared arcs and the position of the first non-shared arc of each linestring
+        shared = self._is_shared_arc[indices]
+        no_first = np.iinfo(np.int64).max
+        first_ns = np.full(no_rows, no_first)
+        np.minimum.at(first_ns, row[~shared], position[~shared])
+        has_ns = first_ns != no_first
+        only_shared = ~has_ns & (lengths > 1)
+
+        # an arc is backward if the previous arc does not exit at its first vertex
+        prev_start, prev_end = np.roll(start, 1), np.roll(end, 1)
+        bw_if_fw, bw_if_bw = prev_end != start, prev_start != start
+        is_const = (position == 0) | ~shared | (bw_if_fw == bw_if_bw)
+        const_val = shared & bw_if_fw & (position > 0)
+
+        # align the first two arcs of linestrings that contain only shared arcs
+        pos0 = indptr[:-1][only_shared]
+        pos1 = pos0 + 1
+        both_bw = (start[pos0] == end[pos1]) & (end[pos0] != start[pos1])
+        first_bw = ~both_bw & (start[pos1] == start[pos0])
+        second_bw = ~both_bw & ~first_bw & (end[pos0] != start[pos1])
+        is_const[pos1] = True
+        const_val[pos0] = both_bw | first_bw
+        const_val[pos1] = both_bw | second_bw
+        backward = self._follow_chain(is_const, const_val, bw_if_fw)
+
+        # follow the shared arcs before the first non-shared arc backwards
+        next_start, next_end = np.roll(start, -1), np.roll(end, -1)
+        bw_if_fw, bw_if_bw = next_start != end, next_end != end
+        leading = (position < first_ns[row]) & has_ns[row]
+        is_const = ~leading | (bw_if_fw == bw_if_bw)
+        const_val = np.where(leading, bw_if_fw, backward)
+        reversed_chain = [is_const[::-1], const_val[::-1], bw_if_fw[::-1]]
+        backward = self._follow_chain(*reversed_chain)[::-1]
+
+        # keep the first occurrence of each arc in a linestring
+        signed = np.where(backward, ~indices, indices)
+        no_arcs = len(data["linestrings"])
+        row_arcs = row * (2 * no_arcs) + signed + no_arcs
+        _, idx_first = np.unique(row_arcs, return_index=True)
+        keep = np.zeros(len(signed), dtype=bool)
+        keep[idx_first] = True
+        signed = signed[keep]
+        kept_indptr = np.concatenate(
+            [[0], np.cumsum(np.bincount(row[keep], minlength=no_rows))]
+        )
+
+        # an arc touching the first vertex of its previous arc breaks the chain
+        entry = np.where(np.roll(backward, 1), prev_end, prev_start)
+        touches_entry = (entry == start) | (entry == end)
+        is_loop = np.zeros(no_rows, dtype=bool)
+        is_loop[row[only_shared[row] & (position > 1) & touches_entry]] = True
+
+        # linestrings that are not the first of their geom are interior rings
+        geoms_indptr, geoms_indices = self._geom_rings
+        geoms_lengths = np.diff(geoms_indptr)
+        is_inner = np.zeros(no_rows, dtype=bool)
+        is_inner[geoms_indices] = np.arange(len(geoms_indices)) != np.repeat(
+            geoms_indptr[:-1], geoms_lengths
+        )
+
+        # check the orientation of linestrings that contain only shared arcs
+        loop_arcs = {}
+        for idx_row in np.flatnonzero(only_shared):
+            self._inner = is_inner[idx_row]
+            row_slice = slice(kept_indptr[idx_row], kept_indptr[idx_row + 1])
+            if is_loop[idx_row]:
+                loop_arcs[idx_row] = self._backward_arcs(
+                    data["bookkeeping_arcs"][idx_row]
+                )
             else:
-                arc = self._data["linestrings"][arc_idx]
-                arcs_geom.append(arc)
-        lring = np.vstack(arcs_geom)
+                signed[row_slice] = self._resolve_orient(
+                    signed[row_slice].tolist(), self._need_ccw(self._inner)
+                )
+
+        # linestrings resolved one by one can have a different number of arcs
+        if loop_arcs:
+            resolved_arcs = lists_from_csr(kept_indptr, signed)
+            for idx_row, arc_ids in loop_arcs.items():
+                resolved_arcs[idx_row] = arc_ids
+            return csr_from_lists(resolved_arcs)
+        return kept_indptr, signed
+
+    def _follow_chain(self, is_const, const_val, negate):
+        """
+        Returns for a sequence of arcs if each arc is backward, where each arc is
+        either backward by a constant value, or backward depending on the previous
+        arc. In the latter case the arc follows the direction of the previous arc,
+        or the opposite if negate is True. The first arc must have a constant value.
+        """
+
+        idx = np.arange(len(is_const))
+        last_const = np.maximum.accumulate(np.where(is_const, idx, 0))
+        no_negate = np.cumsum(negate & ~is_const)
+        return const_val[last_const] ^ ((no_negate - no_negate[last_const]) % 2 == 1)
+
+    def _resolve_orient(self, arcs_idx_geom, need_ccw):
+        """
+        Reverses the ring of the given arcs if its orientation is not as required.
+        The signed area of the ring is the sum of the signed areas of its arcs, where
+        a backward arc contributes the negated value, and of the segments connecting
+        the last vertex of each arc to the first vertex of the next arc.
+        """
+
+        arc_ids = np.asarray(arcs_idx_geom)
+        is_backward = arc_ids < 0
+        arc_ids = np.where(is_backward, ~arc_ids, arc_ids)
+        arc_areas = self._arc_areas[arc_ids]
+        area = np.where(is_backward, -arc_areas, arc_areas).sum()
 
-        if is_ccw(lring) != need_ccw:
-            arcs_idx_geom = (np.array(arcs_idx_geom) * -1 - 1).tolist()
+        # the first and last vertex of each arc in the direction of the ring
+        first = self._arc_ends[arc_ids, is_backward.astype(int)]
+        last = self._arc_ends[arc_ids, (~is_backward).astype(int)]
+        first = np.roll(first, -1, axis=0)
+        area += (last[:, 0] * first[:, 1] - first[:, 0] * last[:, 1]).sum() / 2
+
+        # reverse the order and the direction of the arcs, starting at the same arc
+        if (area >= 0.0) != need_ccw:
+            arcs_idx_geom = arcs_idx_geom[:1] + arcs_idx_geom[:0:-1]
+            arcs_idx_geom = [~arc_idx for arc_idx in arcs_idx_geom]
 
         return arcs_idx_geom
 
-    def _resolve_bookkeeping(self, geoms, key):
+    def _geom_arcs(self, geom):
         """
-        Function that is activated once the key of interest in the find_arcs function
-        is detected. It replaces the geom ids with the corresponding arc ids.
+        Returns for the given geom the arc indices of each of its rings.
         """
 
-        if key == "arcs":
-            bk_objects = "bookkeeping_geoms"
-            bk_element = "bookkeeping_arcs"
-        elif key == "coordinates":
-            bk_objects = bk_element = "bookkeeping_coords"
-            # If bookkeeping_coords is empty, there are no Point geometries to resolve
-            if not self._data[bk_objects]:
-                return geoms
-
-        arcs = []
-        for geom in geoms:
-            arcs_in_geom = copy.copy(self._data[bk_objects][geom])
-            for idx_arc, arc_ref in enumerate(arcs_in_geom):
-                arc_ids = self._data[bk_element][arc_ref]
-                # check if the shared arcs in geom should be backward
-                if len(arc_ids) > 1 and key != "coordinates":
-                    self._inner = True if idx_arc > 0 else False
-                    arc_ids = self._backward_arcs(arc_ids)
-
-                arcs_in_geom[idx_arc] = arc_ids
-            arcs.append(arcs_in_geom)
-        return arcs
-
-    def _resolve_objects(self, keys, dictionary):
+        indptr, indices = self._geom_rings
+        rings = indices[indptr[geom] : indptr[geom + 1]]
+        return [self._ring_lists[ring] for ring in rings]
+
+    def _line_arcs(self, geom):
         """
-        Function that resolves the bookkeeping back to the arcs in the objects.
-        Support also nested dicts such as GeometryCollections
+        Returns for the given geom the arc indices of its rings as a single list.
         """
 
-        for k, v in dictionary.items():
-            # resolve when key equals 'arcs' and v contains arc indices
-            if str(k) in keys and v is not None:
-                dictionary[k] = self._resolve_bookkeeping(v, k)
-                yield v
-            elif k in ["properties", "bbox"]:
-                continue
-            elif isinstance(v, dict):
-                for result in self._resolve_objects(keys, v):
-                    yield result
-            elif isinstance(v, list):
-                for d in v:
-                    for result in self._resolve_objects(keys, d):
-                        yield result
+        rings = self._geom_arcs(geom)
+        if len(rings) == 1:
+            return rings[0]
+        return [arc_idx for ring in rings for arc_idx in ring]
+
+    def _point_coords(self, geom):
+        """
+        Returns for the given geom the indices of its coordinates.
+        """
+
+        # If bookkeeping_coords is empty, there are no Point geometries to resolve
+        bk_coords = self._data["bookkeeping_coords"]
+        if not bk_coords:
+            return geom
+        return [bk_coords[coord_ref] for coord_ref in bk_coords[geom]]
 
     def _resolve_arcs(self, feat):
         """
-        Function that resolves the arcs based on the type of the feature
+        Function that resolves the arcs based on the type of the feature. The geom
+        indices of the feature are replaced by the arc indices of their rings, so
+        nested lists are only created for the resolved features.
         """
         if feat["type"] == "LineString":
             if "geometries" in feat:
                 f_arc = feat["geometries"][0]["arcs"][0]
             else:
                 f_arc = feat["arcs"][0]
-            feat["arcs"] = list(chain.from_iterable(f_arc))
+            feat["arcs"] = self._line_arcs(f_arc)
             feat.pop("geometries", None)
 
         elif feat["type"] == "MultiLineString":
@@ -394,7 +526,7 @@ class Hashmap(Dedup):
                 f_arcs = feat["geometries"][0]["arcs"]
             else:
                 f_arcs = feat["arcs"]
-            feat["arcs"] = [list(chain.from_iterable(arc)) for arc in f_arcs]
+            feat["arcs"] = [self._line_arcs(geom) for geom in f_arcs]
             feat.pop("geometries", None)
 
         elif feat["type"] == "Polygon":
@@ -403,7 +535,7 @@ class Hashmap(Dedup):
             else:
                 f_arc = feat["arcs"]
 
-            feat["arcs"] = list(chain.from_iterable(f_arc))
+            feat["arcs"] = [ring for geom in f_arc for ring in self._geom_arcs(geom)]
             feat.pop("geometries", None)
 
         elif feat["type"] == "MultiPolygon":
@@ -411,7 +543,7 @@ class Hashmap(Dedup):
                 f_arcs = feat["geometries"][0]["arcs"]
             else:
                 f_arcs = feat["arcs"]
-            feat["arcs"] = f_arcs
+            feat["arcs"] = [self._geom_arcs(geom) for geom in f_arcs]
             feat.pop("geometries", None)
 
         elif feat["type"] == "GeometryCollection":
@@ -425,7 +557,9 @@ class Hashmap(Dedup):
             else:
                 f_arc = feat["coordinates"]
 
-            feat["coordinates"] = list(chain.from_iterable(f_arc))
+            feat["coordinates"] = [
+                coord for geom in f_arc for coord in self._point_coords(geom)
+            ]
             feat.pop("geometries", None)
 
         elif feat["type"] == "MultiPoint":
@@ -433,7 +567,7 @@ class Hashmap(Dedup):
                 f_arcs = feat["geometries"][0]["coordinates"]
             else:
                 f_arcs = feat["coordinates"]
-            feat["coordinates"] = f_arcs
+            feat["coordinates"] = [self._point_coords(geom) for geom in f_arcs]
             feat.pop("geometries", None)
 
         return feat
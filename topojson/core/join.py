@@ -1,6 +1,8 @@
 # pylint: disable=unsubscriptable-object
 import copy
+import logging
 import pprint
+import numpy as np
 
 from shapely import geometry
 from shapely.errors import ShapelyError
@@ -10,9 +12,17 @@ from shapely.ops import shared_paths
 from ..ops import bounds
 from ..ops import compare_bounds
 from ..ops import explode
-from ..ops import linemerge_ext
+from ..ops import intersect_combs
+from ..ops import linestring_vertex_ids
+from ..ops import node_linestrings
+from ..ops import prefilter_combs
 from ..ops import quantize
+from ..ops import register_vertices
 from ..ops import select_unique_combs
+from ..ops import shared_coords_junctions
+from ..ops import SHAPELY_GE_20
+from ..ops import shared_segment_junctions
+from ..ops import tile_combs
 from ..utils import serialize_as_svg
 from ..ops import simplify
 from .extract import Extract
@@ -55,9 +65,16 @@ class Join(Extract):
         super().__init__(data, options)
 
         # initiation topology items
-        self._junctions = []
+        self._junctions = np.empty((0, 2))
         self._segments = []
         self._valerr = False
+        self._pruned_combs = 0
+        self._linestring_groups = None
+        self._junction_groups = None
+        self._junction_index = None
+        self._vertices = np.empty((0, 2))
+        self._vertex_ids = None
+        self._junction_ids = np.empty(0, dtype=np.int64)
 
         # execute main function
         self.output = self._joiner(self.output)
@@ -175,61 +192,188 @@ class Join(Extract):
             data["junctions"] = self._junctions
             return data
 
-        if self.options.shared_coords:
-
-            def _get_verts(geom):
-                # get coords of each LineString
-                return [x for x in geom.coords]
-
-            geoms = {}
-            junctions = []
-
-            for ls in data["linestrings"]:
-                verts = _get_verts(ls)
-                for i, vert in enumerate(verts):
-                    ran = geoms.pop(vert, None)
-                    neighs = sorted(
-                        [verts[i - 1], verts[i + 1 if i < len(verts) - 1 else 0]]
-                    )
-                    if ran and ran != neighs:
-                        junctions.append(vert)
-                    geoms[vert] = neighs
+        # identify each distinct vertex by an integer, the table of vertices is
+        # shared by the next steps
+        self._vertex_ids, self._vertices = linestring_vertex_ids(data["linestrings"])
+
+        # prequantized linestring networks without polygons are joined as a network
+        join_method = self.options.join_method
+        if join_method == "auto":
+            use_network = SHAPELY_GE_20 and self.options.prequantize
+            join_method = "network" if use_network else "overlay"
+            join_method = "overlay" if self._has_rings else join_method
+        elif join_method == "network" and not SHAPELY_GE_20:
+            logging.warning(
+                "join_method `network` requires shapely 2, using `overlay` instead."
+            )
+            join_method = "overlay"
 
-            self._junctions = [geometry.Point(xy) for xy in set(junctions)]
+        # objects that do not share topology are joined separately
+        self._linestring_groups = self._get_linestring_groups()
+        if self._linestring_groups is None:
+            self._junctions = self._detect_junctions(
+                data["linestrings"], join_method, self._vertex_ids
+            )
         else:
+            junctions, junction_groups = [], []
+            for group in np.unique(self._linestring_groups):
+                idx_lines = np.flatnonzero(self._linestring_groups == group)
+                group_junctions = self._detect_junctions(
+                    [data["linestrings"][idx] for idx in idx_lines],
+                    join_method,
+                    [self._vertex_ids[idx] for idx in idx_lines],
+                )
+                junctions.append(group_junctions)
+                junction_groups.append(np.full(len(group_junctions), group))
+            # a junction found in several groups is kept once, each group refers to
+            # it by its index
+            self._junctions, self._junction_index = np.unique(
+                np.concatenate(junctions), axis=0, return_inverse=True
+            )
+            self._junction_index = self._junction_index.reshape(-1)
+            self._junction_groups = np.concatenate(junction_groups)
+
+        if self._pruned_combs:
+            logging.debug(
+                "rejected {} couples of linestrings before the intersection".format(
+                    self._pruned_combs
+                )
+            )
 
-            # calculate line intersections between all linestrings
-            idx_combs, _ = select_unique_combs(data["linestrings"])
-            geom_combs = [
-                (data["linestrings"][idx_comb[0]], data["linestrings"][idx_comb[1]])
-                for idx_comb in idx_combs
-            ]
-            # we don't want junctions for equal linestrings, so filter them out
-            geom_combs = [
-                geoms for geoms in geom_combs if not geoms[0].equals(geoms[1])
-            ]
-
-            # calculate line intersections between linestrings
-            intersect_lines = [
-                linemerge_ext(geom1.intersection(geom2)) for geom1, geom2 in geom_combs
-            ]
-            intersect_lines = [line for line in intersect_lines if not line.is_empty]
-            intersect_lines = explode(intersect_lines)
-
-            # the start and end points of the intersect_lines are the junctions
-            junctions = [
-                junction
-                for line in intersect_lines
-                for junction in (line.coords[0], line.coords[-1])
-            ]
-            # keep unique junctions
-            self._junctions = list(map(geometry.Point, set(junctions)))
+        # add the junctions to the table of vertices
+        self._junction_ids, self._vertices = register_vertices(
+            self._junctions, self._vertices
+        )
 
         # prepare to return object
         data["junctions"] = self._junctions
 
         return data
 
+    def _detect_junctions(self, linestrings, join_method, vertex_ids):
+        """
+        Detects the junctions of shared paths between the given linestrings using
+        the given join method.
+
+        Parameters
+        ----------
+        linestrings : list of shapely.geometry.LineString
+            linestrings to detect the junctions of shared paths in
+        join_method : str
+            the resolved join method, one of `overlay`, `network` or `hash`
+        vertex_ids : list of numpy.array
+            for each linestring the ids of its vertices in the table of vertices
+
+        Returns
+        -------
+        numpy.array
+            2-dimensional array with the unique coordinates of the junctions
+        """
+
+        if self.options.shared_coords:
+            # a vertex is a junction if its neighbours differ between occurrences
+            junctions = shared_coords_junctions(linestrings, vertex_ids, self._vertices)
+        elif join_method == "hash":
+            # derive junctions from where runs of shared segments begin and end
+            junctions = shared_segment_junctions(
+                linestrings, vertex_ids, self._vertices
+            )
+        elif join_method == "network":
+            # connect collinear overlaps by coordinates before hashing the segments
+            junctions = shared_segment_junctions(
+                node_linestrings(linestrings, vertex_ids, self._vertices)
+            )
+        elif join_method == "overlay":
+
+            # collect couples of linestrings with overlapping envelopes, at once or
+            # one tile at a time when the data is processed in tiles
+            if self.options.tiles:
+                tiled_combs = tile_combs(linestrings, self.options.tiles)
+            else:
+                tiled_combs = [select_unique_combs(linestrings)[0]]
+
+            junctions = set()
+            for idx_combs in tiled_combs:
+                # reject couples that cannot share a segment or that are equal
+                idx_kept = prefilter_combs(linestrings, idx_combs, vertex_ids)
+                self._pruned_combs += len(idx_combs) - len(idx_kept)
+                geom_combs = [
+                    (linestrings[idx_a], linestrings[idx_b])
+                    for idx_a, idx_b in idx_kept
+                ]
+
+                # calculate line intersections between linestrings
+                intersect_lines = intersect_combs(
+                    geom_combs, n_jobs=self.options.n_jobs
+                )
+                intersect_lines = [ln for ln in intersect_lines if not ln.is_empty]
+                intersect_lines = explode(intersect_lines)
+
+                # the start and end points of the intersect_lines are the junctions
+                junctions.update(
+                    junction
+                    for line in intersect_lines
+                    for junction in (line.coords[0], line.coords[-1])
+                )
+            # keep unique junctions as a 2d coordinate array
+            junctions = list(junctions) or np.empty((0, 2))
+            junctions = np.array(junctions, dtype=float)
+        else:
+            raise NameError(
+                "Could not recognize parameter for `join_method`. Choose between "
+                "'auto', 'overlay', 'network' or 'hash'. '{}' was given".format(
+                    self.options.join_method
+                )
+            )
+
+        return junctions
+
+    def _get_linestring_groups(self):
+        """
+        Returns for each linestring the group of objects that share topology, as
+        set by the `topology_scope` option. Returns None if all objects share
+        topology, as with `None` or `"all"`.
+        """
+
+        scope = self.options.topology_scope
+        if scope in [None, "all"]:
+            return None
+
+        if self._is_multi_geom:
+            object_names = list(self.options.object_name)
+        else:
+            object_names = [self.options.object_name]
+        if isinstance(scope, (list, tuple)):
+            unknown = {name for group in scope for name in group} - set(object_names)
+            if unknown:
+                raise ValueError(
+                    "Parameter `topology_scope` refers to objects that are not in the "
+                    "input: {}. The objects are named {}".format(
+                        sorted(unknown), object_names
+                    )
+                )
+        if not self._is_multi_geom:
+            return None
+
+        if scope == "object":
+            name_groups = {name: ix for ix, name in enumerate(object_names)}
+        elif isinstance(scope, (list, tuple)):
+            name_groups = {name: ix for ix, group in enumerate(scope) for name in group}
+            for ix, name in enumerate(object_names):
+                name_groups.setdefault(name, len(scope) + ix)
+        else:
+            raise NameError(
+                "Could not recognize parameter for `topology_scope`. Choose between "
+                "None, 'all', 'object' or a list of groups of object names. '{}' was "
+                "given".format(scope)
+            )
+
+        # the object of each linestring follows from the key of its feature
+        idx_object = np.searchsorted(
+            self._geom_offset, self._linestring_keys, side="right"
+        )
+        return np.array([name_groups[object_names[ix - 1]] for ix in idx_object])
+
     def _validate_linemerge(self, merged_line):
         """
         Return list of linestrings. If the linemerge was a MultiLineString
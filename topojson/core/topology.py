@@ -3,8 +3,9 @@ import copy
 import numpy as np
 import itertools
 from .hashmap import Hashmap
-from ..ops import np_array_from_arcs
-from ..ops import dequantize
+from ..ops import arcs_from_ragged
+from ..ops import dequantize_ragged
+from ..ops import ragged_from_arcs
 from ..ops import quantize
 from ..ops import simplify
 from ..ops import delta_encoding
@@ -103,6 +104,43 @@ class Topology(Hashmap):
         ignored and overwritten. Otherwise features with ids will use their existing one.
         If indexes are not ignored and a duplicate id exists an exception will be raised.
         Default is false.
+    join_method : str
+        Sets the engine to detect junctions of shared paths when `shared_coords` is
+        `False`. Choose between `auto`, `overlay`, `network` and `hash`. `overlay`
+        intersects each couple of linestrings with overlapping envelopes. `hash`
+        hashes the segments of all linestrings at once and derives the junctions
+        from where shared runs of segments begin and end. `hash` is much faster on
+        large inputs, but only detects shared paths that are made of equal vertices,
+        as is the case for prequantized input. `network` first inserts a vertex
+        wherever a vertex touches the interior of a segment and then proceeds as
+        `hash`, without any pairwise intersection. On prequantized input this gives
+        the junctions of `overlay`. Without prequantization `network` only matches
+        exact vertices, so it misses the computed crossings that `overlay` reports.
+        `network` requires shapely 2 and falls back to `overlay` otherwise. `auto`
+        uses `network` for prequantized inputs without polygons, such as road and
+        river networks, and `overlay` otherwise.
+        Default is `auto`.
+    n_jobs : int
+        Number of threads used to compute the intersections of linestrings with
+        overlapping envelopes when `join_method` is `overlay`. Use `-1` to use all
+        processors. The resulting topology does not depend on this setting.
+        Default is `1`.
+    tiles : int
+        Positive number of tiles along each axis of a grid over the bounding box of
+        the data.
+        When set, the linestrings with overlapping envelopes are collected and
+        intersected one tile at a time to bound the memory used by continent-scale
+        datasets. The resulting topology does not depend on this setting.
+        Default is `None`.
+    topology_scope : str or list of lists
+        Sets which of the objects, as named in `object_name`, share topology with
+        each other. Use `None` or `"all"` to let all objects share topology. Use
+        `"object"` to only detect shared paths within each object. Or provide groups
+        of object names, e.g. `[["admin", "parcels"], ["rivers"]]`, to only detect
+        shared paths within each group, where objects not mentioned form their own
+        group. Paths between objects that do not share topology are neither joined
+        nor cut.
+        Default is `None`.
     """
 
     def __init__(
@@ -120,6 +158,10 @@ class Topology(Hashmap):
         winding_order="CW_CCW",
         object_name="data",
         ignore_index=False,
+        join_method="auto",
+        n_jobs=1,
+        tiles=None,
+        topology_scope=None,
     ):
         options = TopoOptions(locals())
 
@@ -400,18 +442,15 @@ class Topology(Hashmap):
 
         # dequantize if quantization is applied
         if "transform" in result.output.keys():
-            np_arcs = np_array_from_arcs(arcs)
+            coords, offsets = ragged_from_arcs(arcs)
 
             transform = result.output["transform"]
             scale = transform["scale"]
             translate = transform["translate"]
 
-            np_arcs = dequantize(np_arcs, scale, translate)
-            l_arcs = []
-            for ls in np_arcs:
-                l_arcs.append(ls[~np.isnan(ls)[:, 0]].tolist())
-            arcs = l_arcs
-            lsbs = bounds(arcs)
+            coords = dequantize_ragged(coords, offsets, scale, translate)
+            arcs = arcs_from_ragged(coords, offsets)
+            lsbs = bounds(coords)
         else:
             lsbs = bounds(arcs)
 
@@ -496,17 +535,17 @@ class Topology(Hashmap):
         # first do the arcs
         arcs = result.output["arcs"]
         if arcs:
-            np_arcs = np_array_from_arcs(arcs)
+            coords, offsets = ragged_from_arcs(arcs)
 
             # dequantize if transform exist
             if transform is not None:
-                power_estimate = len(str(int(np_arcs[:, 0].max())))
+                power_estimate = len(str(int(coords[offsets[:-1]].max())))
                 quant_factor_estimate = 10**power_estimate
-                np_arcs = dequantize(np_arcs, scale, translate)
+                coords = dequantize_ragged(coords, offsets, scale, translate)
 
             # apply simplify
             result.output["arcs"] = simplify(
-                np_arcs,
+                arcs_from_ragged(coords, offsets),
                 epsilon,
                 algorithm=result.options.simplify_algorithm,
                 package=result.options.simplify_with,
@@ -1,7 +1,8 @@
-import copy
 import itertools
 import logging
+import os
 import pprint
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 from shapely import geometry
@@ -56,48 +57,6 @@ else:
         yield
 
 
-def asvoid(arr):
-    """
-    Utility function to create a 1-dimensional numpy void object (bytes)
-    of a 2-dimensional array. This is useful for the function numpy.in1d(),
-    since it only accepts 1-dimensional objects.
-
-    Parameters
-    ----------
-    arr : numpy.array
-        2-dimensional numpy array
-
-    Returns
-    -------
-    numpy.void
-        1-dimensional numpy void object
-    """
-
-    arr = np.ascontiguousarray(arr)
-    if np.issubdtype(arr.dtype, np.floating):
-        """Care needs to be taken here since
-        np.array([-0.]).view(np.void) != np.array([0.]).view(np.void)
-        Adding 0. converts -0. to 0.
-        """
-        arr += 0.0
-    return arr.view(np.dtype((np.void, arr.dtype.itemsize * arr.shape[-1])))
-
-
-def strtree_query_geoms(tree, arc):
-    # get junctions that contain within bbox line
-    if hasattr(tree, "geometries"):
-        # shapely version >= 1.8.3
-        tree_index = tree.query(arc)
-        tree_geom = tree.geometries.take(tree_index)
-    elif hasattr(tree, "query_geoms"):
-        # 1.8.0 <= shapely version < 1.8.3
-        tree_geom = tree.query_geoms(arc)
-    else:
-        # shapely version < 1.8.0
-        tree_geom = tree.query(arc)
-    return tree_geom  # pts_within_bbox
-
-
 def strtree_query_index(tree, arc, geoms):
     if hasattr(tree, "geometries"):
         # shapely version >= 1.8.3
@@ -159,180 +118,304 @@ def extract_lines(geom: geometry.base.BaseGeometry) -> geometry.base.BaseGeometr
     return geometry.LineString()
 
 
-def np_array_bbox_points_line(line, tree_splitter):
+def query_junctions(linestrings, junctions, line_groups=None, junction_groups=None):
     """
-    Get junctions within bbox of line and return both as numpy array
+    Function that finds the junctions that are within the bounding box of each
+    linestring. The junctions are indexed once and all linestrings are queried
+    at once. If groups are given, only junctions of the same group as the
+    linestring are returned.
 
     Parameters
     ----------
-    line : numpy.array
-        numpy array with coordinates representing a line segment
-    tree_splitter : STRtree
-        a STRtree splitter object
+    linestrings : list of shapely.geometry.LineString
+        list of linestrings
+    junctions : numpy.array
+        2-dimensional array with the coordinates of the junctions
+    line_groups : numpy.array, optional
+        group of each linestring. Default is None.
+    junction_groups : numpy.array, optional
+        group of each junction. Default is None.
 
     Returns
     -------
     numpy.array
-        `ls_xy`, numpy array from coordinates, if any, representing a line segment
+        index of the linestring of each match, sorted
     numpy.array
-        `pts_xy_bbox`, numpy array with coordinates that near or on the line
+        index of the junction of each match, sorted within each linestring
     """
 
-    # get junctions that contain within bbox line
-    pts_within_bbox = strtree_query_geoms(tree_splitter, line)
+    if SHAPELY_GE_20:
+        geoms = np.empty(len(linestrings), dtype=object)
+        geoms[:] = linestrings
+        idx_line, idx_junction = STRtree(shapely.points(junctions)).query(geoms)
+    else:
+        points = [geometry.Point(xy) for xy in junctions]
+        with ignore_shapely2_warnings():
+            tree_splitter = STRtree(points)
+        idx_match = [
+            strtree_query_index(tree_splitter, ls, points) for ls in linestrings
+        ]
+        idx_line = np.repeat(np.arange(len(linestrings)), [len(m) for m in idx_match])
+        idx_junction = np.array(list(itertools.chain(*idx_match)), dtype=np.int64)
 
-    if len(pts_within_bbox) == 0:
-        # no point near bbox, nothing to insert, nothing to split
-        return None, None
-    # convert shapely linestring and multipoint to np.array if there are points on line
-    ls_xy = np.array(line.coords)
-    pts_xy_bbox = np.array([x for pt in pts_within_bbox for x in pt.coords])
+    if line_groups is not None:
+        same_group = line_groups[idx_line] == junction_groups[idx_junction]
+        idx_line, idx_junction = idx_line[same_group], idx_junction[same_group]
 
-    return ls_xy, pts_xy_bbox
+    order = np.lexsort((idx_junction, idx_line))
+    return idx_line[order].astype(np.int64), idx_junction[order].astype(np.int64)
 
 
-def insert_coords_in_line(line, tree_splitter):
+def junctions_per_line(linestrings, junctions, line_groups=None, junction_groups=None):
     """
-    Insert coordinates that are on the line, but where no vertices exists
-
-    Parameters
-    ----------
-    line : numpy.array
-        numpy array with coordinates representing a line segment
-    tree_splitter : STRtree
-        a STRtree splitter object
+    Function that collects for each linestring the junctions that are within its
+    bounding box, see `query_junctions()`.
 
     Returns
     -------
-    (numpy.array)
-        `new_ls_xy` is an array with inserted coordinates, if any, representing a line
-        segment
-    (numpy.array)
-        `pts_xy_on_line` is an array with coordinates that are on the line
+    list of numpy.array
+        for each linestring a 2-dimensional array with the coordinates of the
+        junctions within its bounding box
     """
 
-    # get junctions that contain within bbox line
-    pts_within_bbox = strtree_query_geoms(tree_splitter, line)
-
-    # select junctions that are within tolerance of line
-    tol_dist = 1e-8
-    pts_on_line = list(
-        itertools.compress(
-            pts_within_bbox, [line.distance(pt) < tol_dist for pt in pts_within_bbox]
-        )
-    )
-
-    if len(pts_on_line) == 0:
-        # no point on line, nothing to insert, nothing to split
-        return None, None
-    # convert shapely linestring and multipoint to np.array if there are points on line
-    ls_xy = np.array(line.coords)
-    pts_xy_on_line = np.array([x for pt in pts_on_line for x in pt.coords])
-
-    # select junctions having non existing vertices in linestring
-    tol_float_prc = 1e8
-    pts_xy_nonexst = pts_xy_on_line[
-        ~np.isin(
-            asvoid(np.around(pts_xy_on_line * tol_float_prc).astype(np.int64))[:, 0],
-            asvoid(np.around(ls_xy * tol_float_prc).astype(np.int64))[:, 0],
-        )
-    ]
-    if pts_xy_nonexst.size == 0:
-        return ls_xy, pts_xy_on_line
-    # compute the distance from the beginning of the linestring for each junction on line
-    splitter_dist = np.array(
-        [line.project(pt) for pt in geometry.MultiPoint(pts_xy_nonexst).geoms]
+    idx_line, idx_junction = query_junctions(
+        linestrings, junctions, line_groups, junction_groups
     )
-    splitter_dist = splitter_dist[splitter_dist > 0]
-
-    # sort distance of non-existing junctions and apply sorting to the splitter distance
-    # and corresponding junction coordinates to be inserted.
-    sort_idx = splitter_dist.argsort()
-    splitter_dist = splitter_dist[sort_idx]
-    pts_xy_nonexst = pts_xy_nonexst[sort_idx]
+    splits = np.searchsorted(idx_line, np.arange(1, len(linestrings)))
+    return np.split(junctions[idx_junction], splits)
 
-    # get euclidean distance of all coords of line
-    ls_xy_roll = np.roll(ls_xy, 1, axis=0)
-    roll_min_ls = ls_xy_roll - ls_xy
-    eucl_dist = np.sqrt(np.einsum("ij,ij->i", roll_min_ls, roll_min_ls))
 
-    # the first distance is computed from the first point to the last point, set to 0
-    eucl_dist[0] = 0
-    ls_cumsum = eucl_dist.cumsum()
-
-    # include junctions in linestring
-    insert_idx = np.searchsorted(ls_cumsum, splitter_dist)
-    new_ls_xy = np.insert(ls_xy, insert_idx, pts_xy_nonexst, axis=0)
-
-    return new_ls_xy, pts_xy_on_line
-
-
-def fast_split(line, splitter, is_ring):
+def insert_junctions(
+    linestrings,
+    junctions,
+    line_groups=None,
+    junction_groups=None,
+    vertex_ids=None,
+    junction_ids=None,
+):
     """
-    Split a LineString (numpy.array) with a Point or MultiPoint.
-    This function is a replacement for the shapely.ops.split function, but faster.
+    Function that matches the junctions to the linestrings they are on and inserts
+    the junctions where the linestring has no vertex yet. The candidate junctions
+    of all linestrings are found by a single query, tested on distance at once and
+    located along their linestring at once. Junctions and vertices are matched by
+    their ids in a table of vertices. The inserted junctions are merged into the
+    vertices by sorting on linestring and distance along the linestring.
 
     Parameters
     ----------
-    line : numpy.array
-        numpy array with coordinates that you like to be split
-    splitter : numpy.array
-        numpy array with coordinates on which the line should be tried splitting
-    is_ring : bool
-        True if the line represents a ring. In this case, for the first point found, the
-        linestring will be rotated rather than split. For consecutive points it will be
-        split.
+    linestrings : list of shapely.geometry.LineString
+        list of linestrings
+    junctions : numpy.array
+        2-dimensional array with the coordinates of the junctions
+    line_groups : numpy.array, optional
+        group of each linestring. Default is None.
+    junction_groups : numpy.array, optional
+        group of each junction. Default is None.
+    vertex_ids : list of numpy.array, optional
+        for each linestring the ids of its vertices in the table of vertices.
+        Default is None, the ids are derived from the coordinates.
+    junction_ids : numpy.array, optional
+        id of each junction in the same table of vertices. Default is None.
 
     Returns
     -------
     list of numpy.array
-        If more than 1 item, the line was split. Each item in the list is an
-        array of coordinates.
+        for each linestring the coordinates, including the inserted junctions
+    list of numpy.array
+        for each linestring the coordinates of the junctions that are on the line,
+        junctions on an existing vertex are given by the coordinates of that vertex
     """
 
-    # previously did convert geometries of coordinates from LineString and (Multi)Point
-    # to numpy arrays. This function now expect this as input to save time.
-    # line = np.array(line.coords)
-    # splitter = np.array([x for pt in splitter for x in pt.coords])
+    no_lines = len(linestrings)
+    xy, offsets = ragged_from_arcs(linestrings, dims=2)
+    lengths = np.diff(offsets)
+    line_idx = np.repeat(np.arange(no_lines), lengths)
+    junctions = np.asarray(junctions, dtype=float)[:, :2]
 
-    # locate index of splitter coordinates in linestring
-    tol = 1e8
-    splitter_indices = np.flatnonzero(
-        np.isin(
-            asvoid(np.around(line * tol).astype(np.int64))[:, 0],
-            asvoid(np.around(splitter * tol).astype(np.int64))[:, 0],
-        )
+    idx_line, idx_junction = query_junctions(
+        linestrings, junctions, line_groups, junction_groups
     )
 
-    # For a ring, rotate rather than split for the first splitter_index
-    # Remark: the start and end coordinate of a ring are the same, so keep it that way
-    if is_ring and len(splitter_indices) > 0 and splitter_indices[0] != 0:
-        first_index = splitter_indices[0]
-        line = line[:-1]
-        line = np.roll(line, -first_index, axis=0)
-        line = np.append(line, [line[0]], axis=0)
-        splitter_indices = splitter_indices[1:]
-        splitter_indices = splitter_indices - first_index
-    # compute the indices on which to split the line
-    # cannot split on first or last index of linestring
-    splitter_indices = splitter_indices[
-        (splitter_indices < (line.shape[0] - 1)) & (splitter_indices > 0)
-    ]
+    # select junctions that are within tolerance of line
+    tol_dist = 1e-8
+    if SHAPELY_GE_20:
+        geoms = np.empty(no_lines, dtype=object)
+        geoms[:] = linestrings
+        points = shapely.points(junctions)
+        pts_dist = shapely.distance(geoms[idx_line], points[idx_junction])
+    else:
+        pts_dist = np.array(
+            [
+                linestrings[ix_ls].distance(geometry.Point(junctions[ix_pt]))
+                for ix_ls, ix_pt in zip(idx_line, idx_junction)
+            ]
+        )
+    on_line = pts_dist < tol_dist
+    idx_line, idx_junction = idx_line[on_line], idx_junction[on_line]
 
-    # split the linestring where each sub-array includes the split-point
-    # create a new array with the index elements repeated
-    tmp_indices = np.zeros(line.shape[0], dtype=np.int64)
-    tmp_indices[splitter_indices] = 1
-    tmp_indices += 1
-    ls_xy = np.repeat(line, tmp_indices, axis=0)
+    # a junction is on the first vertex of its linestring with the same id
+    if vertex_ids is None or junction_ids is None:
+        ids, _ = coords_ids(np.concatenate([xy, junctions]))
+        vertex_ids, junction_ids = ids[: len(xy)], ids[len(xy) :]
+    else:
+        vertex_ids = np.concatenate(vertex_ids)
+    no_ids = max(vertex_ids.max(initial=-1), junction_ids.max(initial=-1)) + 1
+    vertex_keys = line_idx * no_ids + vertex_ids
+    junction_keys = idx_line * no_ids + junction_ids[idx_junction]
+    order = np.argsort(vertex_keys, kind="stable")
+    position = np.minimum(
+        np.searchsorted(vertex_keys[order], junction_keys), len(xy) - 1
+    )
+    idx_vertex = np.full(len(junction_keys), -1)
+    if len(xy):
+        found = vertex_keys[order[position]] == junction_keys
+        idx_vertex[found] = order[position[found]]
+
+    # compute the distance from the beginning of the linestring for each vertex
+    # and for each junction that is not on a vertex
+    starts = offsets[:-1][lengths > 0]
+    step = np.zeros(len(xy))
+    step[1:] = np.hypot(*np.diff(xy, axis=0).T)
+    step[starts] = 0
+    total_dist = np.cumsum(step)
+    vertex_dist = total_dist - np.repeat(total_dist[starts], lengths[lengths > 0])
+
+    idx_new = np.flatnonzero(idx_vertex < 0)
+    if SHAPELY_GE_20:
+        new_dist = shapely.line_locate_point(
+            geoms[idx_line[idx_new]], points[idx_junction[idx_new]]
+        )
+    else:
+        new_dist = np.array(
+            [
+                linestrings[ix_ls].project(geometry.Point(junctions[ix_pt]))
+                for ix_ls, ix_pt in zip(idx_line[idx_new], idx_junction[idx_new])
+            ]
+        )
 
-    # update indices to account for the changed array
-    splitter_indices = splitter_indices + np.arange(1, len(splitter_indices) + 1)
+    # a junction within tolerance of a neighbouring vertex is on that vertex
+    first, last = offsets[idx_line[idx_new]], offsets[idx_line[idx_new] + 1] - 1
+    next_vertex = np.searchsorted(total_dist, total_dist[first] + new_dist)
+    for neighbour in [next_vertex - 1, next_vertex]:
+        neighbour = np.clip(neighbour, first, last)
+        offset = np.abs(xy[neighbour] - junctions[idx_junction[idx_new]])
+        is_close = (offset.max(axis=1, initial=0) < tol_dist) & (
+            idx_vertex[idx_new] < 0
+        )
+        idx_vertex[idx_new[is_close]] = neighbour[is_close]
+    is_new = idx_vertex < 0
+    new_dist = new_dist[is_new[idx_new]]
+    idx_new_line, idx_new_junction = idx_line[is_new], idx_junction[is_new]
+
+    # junctions on an existing vertex are reported by the coordinates of that vertex
+    on_line_xy = junctions[idx_junction]
+    on_line_xy[~is_new] = xy[idx_vertex[~is_new]]
+
+    after_start = new_dist > 0
+    new_dist = new_dist[after_start]
+    idx_new_line = idx_new_line[after_start]
+    idx_new_junction = idx_new_junction[after_start]
+
+    # merge the junctions into the vertices, in front of a vertex at equal distance
+    merged_line = np.concatenate([line_idx, idx_new_line])
+    merged_dist = np.concatenate([vertex_dist, new_dist])
+    merged_kind = np.concatenate([np.ones(len(xy)), np.zeros(len(new_dist))])
+    order = np.lexsort((merged_kind, merged_dist, merged_line))
+    merged_xy = np.concatenate([xy, junctions[idx_new_junction]])[order]
+
+    new_lengths = lengths + np.bincount(idx_new_line, minlength=no_lines)
+    lines_xy = np.split(merged_xy, np.cumsum(new_lengths)[:-1])
+    splits = np.searchsorted(idx_line, np.arange(1, no_lines))
+    return lines_xy, np.split(on_line_xy, splits)
+
+
+def split_lines(coords, offsets, split_mask, is_ring):
+    """
+    Function that splits all linestrings of a ragged coordinate store at once and
+    removes the collinear points of the resulting pieces. The split positions and
+    the collinear vertices are marked for all linestrings in a single pass.
 
-    # split using the indices as usual
-    slines = np.split(ls_xy, splitter_indices, axis=0)
+    Parameters
+    ----------
+    coords : numpy.array
+        2-dimensional array with the coordinates of all linestrings
+    offsets : numpy.array
+        offsets of the linestrings in coords, see `ragged_from_arcs()`
+    split_mask : numpy.array
+        boolean array, True for each vertex on which its linestring is split
+    is_ring : numpy.array
+        boolean array, True for each linestring that represents a ring. A ring is
+        rotated to start at its first split vertex rather than split there. A ring
+        without split vertices is rotated to start at its lexicographically
+        smallest vertex, so equal rings get the same start vertex.
 
-    return slines
+    Returns
+    -------
+    numpy.array
+        2-dimensional array with the coordinates of all pieces
+    numpy.array
+        offsets of the pieces in the returned coordinates
+    numpy.array
+        number of pieces of each linestring
+    """
+
+    lengths = np.diff(offsets)
+    no_lines = len(lengths)
+    line_idx = np.repeat(np.arange(no_lines), lengths)
+    position = np.arange(len(coords)) - offsets[:-1][line_idx]
+
+    # position of the first split vertex of each linestring
+    idx_split = np.flatnonzero(split_mask)
+    first_split = np.zeros(no_lines, dtype=np.int64)
+    lines_split, idx_first = np.unique(line_idx[idx_split], return_index=True)
+    first_split[lines_split] = position[idx_split[idx_first]]
+
+    # rings without split vertices start at their smallest vertex instead
+    no_split = is_ring.copy()
+    no_split[lines_split] = False
+    idx_vertex = np.flatnonzero(no_split[line_idx] & (position < lengths[line_idx] - 1))
+    idx_vertex = idx_vertex[
+        np.lexsort((coords[idx_vertex, 1], coords[idx_vertex, 0], line_idx[idx_vertex]))
+    ]
+    lines_min, idx_first = np.unique(line_idx[idx_vertex], return_index=True)
+    first_split[lines_min] = position[idx_vertex[idx_first]]
+
+    # rotate rings to start at their first split vertex, if not already. The start
+    # and end coordinate of a ring are the same, so the closing vertex is skipped
+    rotate = (is_ring & (first_split > 0))[line_idx]
+    period = np.maximum(lengths - 1, 1)[line_idx]
+    src = np.where(rotate, (position + first_split[line_idx]) % period, position)
+    src += offsets[:-1][line_idx]
+    coords = coords[src]
+    split_mask = split_mask[src]
+
+    # split at interior split vertices, where each piece includes the split vertex
+    is_split = split_mask & (position > 0) & (position < lengths[line_idx] - 1)
+    repeats = 1 + is_split
+    rows = np.repeat(np.arange(len(coords)), repeats)
+    first_row = np.cumsum(repeats) - repeats
+    piece_start = np.zeros(len(rows), dtype=bool)
+    piece_start[first_row[position == 0]] = True
+    piece_start[first_row[is_split] + 1] = True
+    piece_end = np.ones(len(rows), dtype=bool)
+    piece_end[:-1] = piece_start[1:]
+    coords = coords[rows]
+
+    # remove collinear interior vertices of the pieces
+    idx = np.flatnonzero(~piece_start & ~piece_end)
+    p1, p2, p3 = coords[idx - 1], coords[idx], coords[idx + 1]
+    collinear = (p2[:, 0] - p1[:, 0]) * (p3[:, 1] - p1[:, 1]) == (
+        p3[:, 0] - p1[:, 0]
+    ) * (p2[:, 1] - p1[:, 1])
+    keep = np.ones(len(rows), dtype=bool)
+    keep[idx[collinear]] = False
+
+    piece_idx = np.cumsum(piece_start) - 1
+    no_pieces = piece_idx[-1] + 1 if len(piece_idx) else 0
+    piece_lengths = np.bincount(piece_idx[keep], minlength=no_pieces)
+    piece_offsets = np.concatenate([[0], np.cumsum(piece_lengths)])
+    pieces_per_line = np.bincount(line_idx[rows[piece_start]], minlength=no_lines)
+    return coords[keep], piece_offsets, pieces_per_line
 
 
 def signed_area(ring):
@@ -357,6 +440,35 @@ def signed_area(ring):
     return signed_area
 
 
+def arc_signed_areas(coords, offsets):
+    """
+    Compute for all arcs of a ragged store at once their contribution to the signed
+    area of a ring, as the partial shoelace sum over the segments of each arc. The
+    signed area of a ring is the sum of the contributions of its arcs, where a
+    reversed arc contributes the negated value, plus the contributions of the
+    segments connecting the arcs.
+
+    Parameters
+    ----------
+    coords : numpy.array
+        coordinates of all arcs
+    offsets : numpy.array
+        offsets of the arcs in coords, see `ragged_from_arcs()`
+
+    Returns
+    -------
+    numpy.array
+        the signed area contribution of each arc
+    """
+
+    xs, ys = coords[:, 0], coords[:, 1]
+    cross = xs[:-1] * ys[1:] - xs[1:] * ys[:-1]
+    # segments connecting the last vertex of an arc to the next arc are excluded
+    arc_idx = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))[:-1]
+    cross[offsets[1:-1] - 1] = 0.0
+    return np.bincount(arc_idx, weights=cross, minlength=len(offsets) - 1) / 2
+
+
 def is_ccw(ring):
     """
     Provide information if a given ring is clockwise or counterclockwise.
@@ -477,45 +589,75 @@ def compare_bounds(b0, b1):
     return bounds
 
 
-def np_array_from_lists(nested_lists):
+def csr_from_lists(nested_lists):
     """
-    Function to create numpy array from nested lists. The shape of the numpy array
-    are the number of nested lists (rows) x the length of the longest nested list
-    (columns). Rows that contain less values are filled with np.nan values.
+    Function to create a compressed sparse row (CSR) structure from nested lists of
+    integers. The values of all nested lists are stored in a single array and the
+    nested lists are referenced by pointers in this array, where nested list `i` is
+    `indices[indptr[i]:indptr[i + 1]]`.
 
     Parameters
     ----------
     nested_lists : list of lists
-        list containing nested lists of different sizes.
+        list containing nested lists of integers of different sizes.
 
     Returns
     -------
     numpy.ndarray
-        array created from nested lists, np.nan is used to fill the array
+        pointers to the start of each nested list, of length `len(nested_lists) + 1`
+    numpy.ndarray
+        values of all nested lists
     """
 
-    np_array = np.array(list(itertools.zip_longest(*nested_lists, fillvalue=np.nan))).T
-    return np_array
+    lengths = [len(nested_list) for nested_list in nested_lists]
+    indptr = np.concatenate([[0], np.cumsum(lengths, dtype=np.int64)])
+    indices = np.fromiter(
+        itertools.chain.from_iterable(nested_lists), dtype=np.int64, count=indptr[-1]
+    )
+    return indptr, indices
 
 
-def lists_from_np_array(np_array):
+def lists_from_csr(indptr, indices):
     """
-    Function to convert numpy array to list, where elements set as np.nan
-    are filtered
+    Function to convert a compressed sparse row (CSR) structure to nested lists,
+    see `csr_from_lists()`.
     """
 
-    nested_lists = [obj[~np.isnan(obj)].astype(np.int64).tolist() for obj in np_array]
-    return nested_lists
+    values = indices.tolist()
+    slices = zip(indptr[:-1].tolist(), indptr[1:].tolist())
+    return [values[start:end] for start, end in slices]
 
 
-def np_array_from_arcs(arcs):
-    max_len_arc = len(max(arcs, key=len))
-    no_arcs = len(arcs)
-    np_array = np.empty((no_arcs, max_len_arc, 2))
-    np_array.fill(np.nan)
-    for idx in range(no_arcs):
-        np_array[idx, 0 : len(arcs[idx])] = arcs[idx]
-    return np_array
+def remap_csr(indptr, indices, index_map):
+    """
+    Function that replaces the values of a compressed sparse row (CSR) structure by
+    a single gather from an index map. Values that map to a negative index are
+    removed from their row.
+
+    Parameters
+    ----------
+    indptr : numpy.ndarray
+        pointers to the start of each row
+    indices : numpy.ndarray
+        values of all rows
+    index_map : numpy.ndarray
+        new value for each old value, negative to remove the value
+
+    Returns
+    -------
+    numpy.ndarray
+        pointers to the start of each row
+    numpy.ndarray
+        new values of all rows
+    """
+
+    indices = index_map[indices]
+    keep = indices >= 0
+    no_rows = len(indptr) - 1
+    rows = np.repeat(np.arange(no_rows), np.diff(indptr))
+    counts = np.bincount(rows[keep], minlength=no_rows)
+    indptr = np.concatenate([[0], np.cumsum(counts, dtype=np.int64)])
+    return indptr, indices[keep]
 
 
 def dequantize(np_arcs, scale, translate):
@@ -523,6 +665,67 @@ def dequantize(np_arcs, scale, translate):
     return dequantized_arcs
 
 
+def ragged_from_arcs(arcs, dims=None):
+    """
+    Function to create a ragged coordinate store from arcs of different lengths.
+    The coordinates of all arcs are stored in a single contiguous buffer and the
+    arcs are referenced by offsets in this buffer, where arc `i` is
+    `coords[offsets[i]:offsets[i + 1]]`. No padding is needed, so a single long
+    arc does not inflate the memory of all other arcs.
+
+    Parameters
+    ----------
+    arcs : list of lists, numpy.array or shapely.geometry.LineString
+        arcs to store
+    dims : int, optional
+        number of leading coordinate dimensions to keep, e.g. `2` to drop the z
+        values. Default is None, all dimensions are kept.
+
+    Returns
+    -------
+    numpy.ndarray
+        2-dimensional array with the coordinates of all arcs
+    numpy.ndarray
+        1-dimensional array with the offsets of the arcs, of length `len(arcs) + 1`
+    """
+
+    arcs = [np.asarray(arc.coords if hasattr(arc, "coords") else arc) for arc in arcs]
+    if dims is not None:
+        arcs = [arc.reshape(len(arc), -1)[:, :dims] for arc in arcs]
+    lengths = [len(arc) for arc in arcs]
+    offsets = np.concatenate([[0], np.cumsum(lengths, dtype=np.int64)])
+    if not arcs:
+        return np.empty((0, 2)), offsets
+    return np.concatenate(arcs).astype(float), offsets
+
+
+def arcs_from_ragged(coords, offsets):
+    """
+    Function that returns the arcs of a ragged coordinate store as a list of views
+    on the coordinate buffer, see `ragged_from_arcs()`.
+    """
+
+    if len(offsets) < 2:
+        return []
+    return np.split(coords, offsets[1:-1])
+
+
+def dequantize_ragged(coords, offsets, scale, translate):
+    """
+    Function that dequantizes the delta-encoded arcs of a ragged coordinate store
+    at once. The cumulative sum is taken over the whole buffer and the sum up to
+    the start of each arc is subtracted again.
+    """
+
+    cumsum = coords.cumsum(axis=0)
+    lengths = np.diff(offsets)
+    starts = offsets[:-1][lengths > 0]
+    before_start = np.zeros((len(starts), coords.shape[1]))
+    before_start[starts > 0] = cumsum[starts[starts > 0] - 1]
+    cumsum -= np.repeat(before_start, lengths[lengths > 0], axis=0)
+    return cumsum * scale + translate
+
+
 def get_matches(geoms, tree_idx):
     """
     Function to return the indices of the rtree that intersects with the input geometries
@@ -594,6 +797,20 @@ def select_unique_combs(linestrings):
     # create spatial index
     with ignore_shapely2_warnings():
         tree_idx = STRtree(linestrings)
+
+    if SHAPELY_GE_20:
+        # query all linestrings at once, returns an index array of input and tree
+        idx_input, idx_tree = tree_idx.query(linestrings)
+
+        # keep each couple once, ordered as (lowest index, highest index)
+        keep = idx_input < idx_tree
+        idx_input = idx_input[keep].astype(np.int64)
+        idx_tree = idx_tree[keep].astype(np.int64)
+        keys = np.unique(idx_input * len(linestrings) + idx_tree)
+        uniq_line_combs = np.column_stack(np.divmod(keys, len(linestrings)))
+
+        return uniq_line_combs, tree_idx
+
     # get index of linestrings intersecting each linestring
     idx_match = get_matches(linestrings, tree_idx)
 
@@ -610,6 +827,791 @@ def select_unique_combs(linestrings):
     return uniq_line_combs, tree_idx
 
 
+def tile_combs(linestrings, tiles):
+    """
+    Function that yields the unique couple combinations of linestrings with
+    overlapping envelopes one tile at a time. The bounding box of the linestrings
+    is divided into a grid of `tiles` by `tiles` cells. Each couple is assigned to
+    the tile containing the center of the intersection of both envelopes, so every
+    couple is returned exactly once.
+
+    Parameters
+    ----------
+    linestrings : list of LineString
+        list where each item is a shapely LineString
+    tiles : int
+        number of tiles along each axis of the grid
+
+    Yields
+    ------
+    numpy.array
+        2 dimensional array, with on each row the index combination of a unique
+        couple LineString with overlapping envelope within the tile
+    """
+
+    if not SHAPELY_GE_20 or len(linestrings) < 2:
+        yield select_unique_combs(linestrings)[0]
+        return
+
+    geoms = np.empty(len(linestrings), dtype=object)
+    geoms[:] = linestrings
+    env = shapely.bounds(geoms)
+    minx, miny = env[:, 0].min(), env[:, 1].min()
+    maxx, maxy = env[:, 2].max(), env[:, 3].max()
+    width = (maxx - minx) / tiles or 1.0
+    height = (maxy - miny) / tiles or 1.0
+    tree_idx = STRtree(geoms)
+
+    for row, col in itertools.product(range(tiles), range(tiles)):
+        # a small margin guards against rounding of the tile assignment below,
+        # couples assigned to other tiles are filtered out afterwards
+        tile = geometry.box(
+            minx + (col - 1e-6) * width,
+            miny + (row - 1e-6) * height,
+            minx + (col + 1 + 1e-6) * width,
+            miny + (row + 1 + 1e-6) * height,
+        )
+        idx_tile = tree_idx.query(tile)
+        idx_input, idx_tree = tree_idx.query(geoms[idx_tile])
+        idx_input = idx_tile[idx_input].astype(np.int64)
+        idx_tree = idx_tree.astype(np.int64)
+        keep = idx_input < idx_tree
+        idx_input, idx_tree = idx_input[keep], idx_tree[keep]
+
+        # center of the intersection of the envelopes decides the tile of a couple
+        env1, env2 = env[idx_input], env[idx_tree]
+        center_x = (
+            np.maximum(env1[:, 0], env2[:, 0]) + np.minimum(env1[:, 2], env2[:, 2])
+        ) / 2
+        center_y = (
+            np.maximum(env1[:, 1], env2[:, 1]) + np.minimum(env1[:, 3], env2[:, 3])
+        ) / 2
+        tile_col = np.clip((center_x - minx) // width, 0, tiles - 1)
+        tile_row = np.clip((center_y - miny) // height, 0, tiles - 1)
+        keep = (tile_col == col) & (tile_row == row)
+
+        keys = np.unique(idx_input[keep] * len(geoms) + idx_tree[keep])
+        yield np.column_stack(np.divmod(keys, len(geoms)))
+
+
+def prefilter_combs(linestrings, idx_combs, vertex_ids=None):
+    """
+    Function that rejects couples of linestrings that cannot contribute junctions,
+    before the more expensive intersection is computed. A couple can only share a
+    segment if it has a vertex in common, or if a vertex of one linestring lies on
+    the other linestring. Couples that pass these tests but turn out to be equal
+    are dropped as well, where the exact equality test is only evaluated for
+    couples with identical bounds.
+
+    Parameters
+    ----------
+    linestrings : list of shapely.geometry.LineString
+        list of linestrings
+    idx_combs : numpy.array
+        2 dimensional array, with on each row the index combination of a couple
+        of linestrings, as is returned by `select_unique_combs()`
+    vertex_ids : list of numpy.array, optional
+        for each linestring the ids of its vertices in the table of vertices.
+        Default is None, the ids are derived from the coordinates.
+
+    Returns
+    -------
+    numpy.array
+        2 dimensional array with the index combinations that are kept
+    """
+
+    idx_combs = np.asarray(idx_combs, dtype=np.int64).reshape(-1, 2)
+    if not len(idx_combs):
+        return idx_combs
+
+    # only the linestrings that are part of a couple are considered
+    idx_lines, local_combs = np.unique(idx_combs, return_inverse=True)
+    local_combs = local_combs.reshape(-1, 2)
+    linestrings = [linestrings[idx] for idx in idx_lines]
+
+    no_lines = len(linestrings)
+    xy, offsets = ragged_from_arcs(linestrings, dims=2)
+    lengths = np.diff(offsets)
+    line_idx = np.repeat(np.arange(no_lines), lengths)
+    if vertex_ids is None:
+        vertex_id, _ = coords_ids(xy)
+    else:
+        vertex_id = np.concatenate([vertex_ids[idx] for idx in idx_lines])
+
+    # unique (vertex, linestring) occurrences, sorted on vertex
+    occurrences = np.unique(vertex_id * no_lines + line_idx)
+    occ_vertex, occ_line = np.divmod(occurrences, no_lines)
+
+    # couple each occurrence with the later occurrences of the same vertex
+    group_end = np.searchsorted(occ_vertex, occ_vertex, side="right")
+    counts = group_end - np.arange(len(occ_vertex)) - 1
+    first = np.repeat(np.arange(len(occ_vertex)), counts)
+    step = np.arange(len(first)) - np.repeat(np.cumsum(counts) - counts, counts)
+    second = first + step + 1
+    common_keys = occ_line[first] * no_lines + occ_line[second]
+
+    comb_keys = local_combs[:, 0] * no_lines + local_combs[:, 1]
+    keep = np.isin(comb_keys, common_keys)
+
+    # couples without a common vertex can still overlap if a vertex of one of the
+    # two linestrings lies on the other linestring. Only couples that intersect are
+    # tested for this, using the distance between the linestring and the vertices
+    # of the other linestring. The tolerance covers the rounding of the distance,
+    # so no overlap is missed
+    tolerance = np.abs(xy).max() * 1e-9
+    if SHAPELY_GE_20:
+        geoms = np.empty(no_lines, dtype=object)
+        geoms[:] = linestrings
+        no_common = np.flatnonzero(~keep)
+        idx_a, idx_b = local_combs[no_common, 0], local_combs[no_common, 1]
+        no_common = no_common[shapely.intersects(geoms[idx_a], geoms[idx_b])]
+        if len(no_common):
+            points = shapely.multipoints(xy, indices=line_idx)
+            idx_a, idx_b = local_combs[no_common, 0], local_combs[no_common, 1]
+            keep[no_common] = shapely.dwithin(
+                geoms[idx_b], points[idx_a], tolerance
+            ) | shapely.dwithin(geoms[idx_a], points[idx_b], tolerance)
+        bounds = shapely.bounds(geoms)
+    else:
+        # same tests, evaluated couple by couple
+        for idx in np.flatnonzero(~keep):
+            idx_a, idx_b = local_combs[idx]
+            ls_a, ls_b = linestrings[idx_a], linestrings[idx_b]
+            if ls_a.intersects(ls_b):
+                xy_a = xy[offsets[idx_a] : offsets[idx_a + 1]]
+                xy_b = xy[offsets[idx_b] : offsets[idx_b + 1]]
+                keep[idx] = (
+                    ls_a.distance(geometry.MultiPoint(xy_b)) <= tolerance
+                    or ls_b.distance(geometry.MultiPoint(xy_a)) <= tolerance
+                )
+        bounds = np.array([ls.bounds for ls in linestrings])
+
+    # we don't want junctions for equal linestrings, since equal linestrings have
+    # identical bounds the equality test is limited to those couples. Exact
+    # duplicates are recognised from their vertex ids, without an `equals` test
+    same_bounds = np.flatnonzero(
+        keep & (bounds[local_combs[:, 0]] == bounds[local_combs[:, 1]]).all(axis=1)
+    )
+    for idx in same_bounds:
+        idx_a, idx_b = local_combs[idx]
+        ids_a = vertex_id[offsets[idx_a] : offsets[idx_a + 1]]
+        ids_b = vertex_id[offsets[idx_b] : offsets[idx_b + 1]]
+        if np.array_equal(ids_a, ids_b) or np.array_equal(ids_a, ids_b[::-1]):
+            keep[idx] = False
+        elif linestrings[idx_a].equals(linestrings[idx_b]):
+            keep[idx] = False
+
+    return idx_combs[keep]
+
+
+def resolve_n_jobs(n_jobs):
+    """
+    Function that resolves the number of workers to use. `None` or `1` means a
+    single worker, negative values count back from the number of processors
+    (`-1` uses all processors).
+    """
+
+    if not n_jobs:
+        return 1
+    if n_jobs < 0:
+        n_jobs = max((os.cpu_count() or 1) + 1 + n_jobs, 1)
+    return int(n_jobs)
+
+
+def chunk_by_cost(costs, target):
+    """
+    Function that groups items into chunks of roughly equal cost. Items are ordered
+    from most to least expensive and packed into chunks until the target cost is
+    reached, so expensive items end up in small chunks that are handed out first.
+
+    Parameters
+    ----------
+    costs : numpy.array
+        estimated cost of each item
+    target : float
+        target cost of a single chunk
+
+    Returns
+    -------
+    list of numpy.array
+        list of chunks, each containing the indices of the items in the chunk
+    """
+
+    order = np.argsort(-costs, kind="stable")
+    sorted_costs = costs[order]
+    # chunk of each item based on the cumulative cost before the item, an item that
+    # exceeds the target on its own is therefore never combined with the next item
+    chunk_id = np.floor((np.cumsum(sorted_costs) - sorted_costs) / target)
+    splits = np.flatnonzero(np.diff(chunk_id)) + 1
+    return np.split(order, splits)
+
+
+def line_windows(geom, window_size):
+    """
+    Function that splits a linestring into windows of consecutive segments. Each
+    window contains at most `window_size` segments and shares its first and last
+    vertex with the neighbouring windows.
+
+    Parameters
+    ----------
+    geom : shapely.geometry.LineString
+        linestring to split into windows
+    window_size : int
+        maximum number of segments within a single window
+
+    Returns
+    -------
+    numpy.array
+        array of shapely.geometry.LineString, one per window
+    """
+
+    coords = shapely.get_coordinates(geom)
+    no_segments = max(len(coords) - 1, 1)
+    starts = np.arange(0, no_segments, window_size)
+    lengths = np.minimum(starts + window_size, no_segments) - starts + 1
+    offsets = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    coords_idx = np.repeat(starts, lengths) + np.arange(lengths.sum()) - offsets
+    window_idx = np.repeat(np.arange(len(starts)), lengths)
+    return shapely.linestrings(coords[coords_idx], indices=window_idx)
+
+
+def intersect_windowed(geom1, geom2, window_size=128, cache=None):
+    """
+    Function that computes the merged line intersection of two linestrings from
+    windows of their segments. Only windows with overlapping envelopes are
+    intersected and the partial results are merged back into shared paths. The
+    windows of the longer linestring are indexed, so the cost follows the length
+    of the shorter linestring and the shared paths, instead of the length of both
+    linestrings.
+
+    Parameters
+    ----------
+    geom1, geom2 : shapely.geometry.LineString
+        linestrings to intersect
+    window_size : int, optional
+        maximum number of segments within a single window. Default is 128.
+    cache : dict, optional
+        cache of the windows and their spatial index, to be reused for linestrings
+        that are intersected multiple times. Default is None.
+
+    Returns
+    -------
+    shapely.geometry.LineString or shapely.geometry.MultiLineString
+        merged line intersection of both linestrings
+    """
+
+    if not SHAPELY_GE_20:
+        return linemerge_ext(geom1.intersection(geom2))
+    if cache is None:
+        cache = {}
+
+    def _windows(geom):
+        if id(geom) not in cache:
+            windows = line_windows(geom, window_size)
+            cache[id(geom)] = (geom, windows, STRtree(windows))
+        return cache[id(geom)][1:]
+
+    if shapely.get_num_coordinates(geom1) > shapely.get_num_coordinates(geom2):
+        geom1, geom2 = geom2, geom1
+    windows1, _ = _windows(geom1)
+    windows2, tree2 = _windows(geom2)
+    idx_windows1, idx_windows2 = tree2.query(windows1)
+    pieces = shapely.intersection(windows1[idx_windows1], windows2[idx_windows2])
+    pieces = [extract_lines(piece) for piece in pieces]
+    pieces = [piece for piece in pieces if not piece.is_empty]
+    if not pieces:
+        return geometry.LineString()
+
+    # dissolve and node the pieces as the intersection of the complete
+    # linestrings would, before merging them into shared paths
+    return linemerge_ext(shapely.union_all(pieces))
+
+
+def intersect_combs(geom_combs, n_jobs=1, window_size=128):
+    """
+    Function that computes the merged line intersection of each couple of
+    linestrings. If `n_jobs` is larger than 1 the couples are spread over a pool of
+    threads. The cost of each couple is estimated from its number of vertices and the
+    couples are packed into chunks of roughly equal cost. The most expensive chunks
+    are submitted first and idle workers pick up the next chunk from the shared
+    queue, so a single expensive couple does not keep the other workers waiting.
+    Couples containing a linestring of more than two windows are intersected
+    window by window, see `intersect_windowed()`.
+
+    Parameters
+    ----------
+    geom_combs : list of tuple
+        list of couples of shapely.geometry.LineString
+    n_jobs : int, optional
+        number of workers, `-1` uses all processors. Default is 1.
+    window_size : int, optional
+        maximum number of segments within a single window of a long linestring.
+        Default is 128.
+
+    Returns
+    -------
+    list of shapely.geometry
+        merged line intersection of each couple, in the order of the input
+    """
+
+    if not len(geom_combs):
+        return []
+
+    geoms1 = np.empty(len(geom_combs), dtype=object)
+    geoms2 = np.empty(len(geom_combs), dtype=object)
+    geoms1[:], geoms2[:] = zip(*geom_combs)
+
+    # overlay cost grows with the number of vertices of both linestrings
+    if SHAPELY_GE_20:
+        no_coords1 = shapely.get_num_coordinates(geoms1)
+        no_coords2 = shapely.get_num_coordinates(geoms2)
+    else:
+        no_coords1 = np.array([len(g.coords) for g in geoms1])
+        no_coords2 = np.array([len(g.coords) for g in geoms2])
+    is_long = np.maximum(no_coords1, no_coords2) > 2 * window_size
+    cache = {}
+
+    def _intersect_chunk(chunk):
+        lines = [None] * len(chunk)
+        for idx, comb in enumerate(chunk):
+            if is_long[comb]:
+                lines[idx] = intersect_windowed(
+                    geoms1[comb], geoms2[comb], window_size, cache
+                )
+        short = np.flatnonzero(~is_long[chunk])
+        if SHAPELY_GE_20:
+            # vectorized intersection releases the GIL
+            intersections = shapely.intersection(
+                geoms1[chunk[short]], geoms2[chunk[short]]
+            )
+        else:
+            intersections = [
+                geoms1[comb].intersection(geoms2[comb]) for comb in chunk[short]
+            ]
+        for idx, geom in zip(short, intersections):
+            lines[idx] = linemerge_ext(geom)
+        return chunk, lines
+
+    n_jobs = resolve_n_jobs(n_jobs)
+    if n_jobs == 1 or len(geom_combs) < 2:
+        return _intersect_chunk(np.arange(len(geom_combs)))[1]
+
+    size = (no_coords1 + no_coords2).astype(float)
+    costs = size * np.log2(size + 1)
+    chunks = chunk_by_cost(costs, max(costs.sum() / (n_jobs * 16), 1))
+
+    intersect_lines = [None] * len(geom_combs)
+    with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+        for chunk, lines in executor.map(_intersect_chunk, chunks):
+            for idx, line in zip(chunk, lines):
+                intersect_lines[idx] = line
+    return intersect_lines
+
+
+def hash_ids(ids):
+    """
+    Function to scramble integer ids into well-distributed 64-bit hash values
+    (splitmix64 finalizer). Sums of these values can be used as an order-independent
+    fingerprint of a set of ids.
+
+    Parameters
+    ----------
+    ids : numpy.array
+        1-dimensional array of non-negative integers
+
+    Returns
+    -------
+    numpy.array
+        1-dimensional array of uint64 hash values
+    """
+
+    with np.errstate(over="ignore"):
+        z = np.asarray(ids).astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        z = z ^ (z >> np.uint64(31))
+    return z
+
+
+def coords_ids(coords):
+    """
+    Function that assigns an integer id to each distinct coordinate. Equal
+    coordinates receive the same id. The ids follow the lexicographic order of the
+    coordinates.
+
+    Parameters
+    ----------
+    coords : numpy.array
+        2-dimensional array of coordinates
+
+    Returns
+    -------
+    numpy.array
+        1-dimensional array with the id of each coordinate
+    numpy.array
+        2-dimensional array with the distinct coordinates, indexed by id
+    """
+
+    coords = np.asarray(coords)
+    if not len(coords):
+        return np.empty(0, dtype=np.int64), coords
+    # adding 0. converts -0. to 0.
+    coords = coords + 0.0
+    order = np.lexsort(coords.T[::-1])
+    sorted_coords = coords[order]
+    is_new = np.ones(len(coords), dtype=bool)
+    is_new[1:] = np.any(sorted_coords[1:] != sorted_coords[:-1], axis=1)
+
+    ids = np.empty(len(coords), dtype=np.int64)
+    ids[order] = np.cumsum(is_new) - 1
+    return ids, sorted_coords[is_new]
+
+
+def register_vertices(coords, vertices):
+    """
+    Function that looks up the id of each coordinate in a table of distinct
+    vertices, such as created by `coords_ids()`. Coordinates that are not in the
+    table yet are appended to it, so the ids of the existing vertices remain valid.
+    All coordinates are looked up at once by a binary search on the table.
+
+    Parameters
+    ----------
+    coords : numpy.array
+        2-dimensional array of coordinates, only the first two columns are used
+    vertices : numpy.array
+        2-dimensional array with the distinct coordinates, indexed by id
+
+    Returns
+    -------
+    numpy.array
+        1-dimensional array with the id of each coordinate
+    numpy.array
+        2-dimensional array with the distinct coordinates, extended with the
+        coordinates that were not in the table yet
+    """
+
+    # a complex view of the (x, y) pairs sorts and compares lexicographically, -0.
+    # is converted to 0. as in `coords_ids()`
+    coords = np.asarray(coords, dtype=float)
+    coords = np.ascontiguousarray(coords.reshape(-1, coords.shape[-1] or 2)[:, :2])
+    coords = coords + 0.0
+    vertices = np.ascontiguousarray(np.asarray(vertices, dtype=float).reshape(-1, 2))
+    keys = coords.view(np.complex128)[:, 0]
+    vertex_keys = vertices.view(np.complex128)[:, 0]
+
+    order = np.argsort(vertex_keys)
+    sorted_keys = vertex_keys[order]
+    position = np.minimum(np.searchsorted(sorted_keys, keys), len(vertices) - 1)
+    found = np.zeros(len(coords), dtype=bool)
+    if len(vertices):
+        found = sorted_keys[position] == keys
+
+    ids = np.empty(len(coords), dtype=np.int64)
+    ids[found] = order[position[found]]
+    new_ids, new_vertices = coords_ids(coords[~found])
+    ids[~found] = new_ids + len(vertices)
+    return ids, np.concatenate([vertices, new_vertices])
+
+
+def linestring_vertex_ids(linestrings):
+    """
+    Function that creates the table of distinct vertices of all linestrings and
+    assigns to each vertex of each linestring the integer id of its coordinate.
+    Equal coordinates receive the same id, see `coords_ids()`.
+
+    Parameters
+    ----------
+    linestrings : list of shapely.geometry.LineString
+        list of linestrings
+
+    Returns
+    -------
+    list of numpy.array
+        for each linestring the ids of its vertices
+    numpy.array
+        2-dimensional array with the distinct coordinates, indexed by id
+    """
+
+    if not len(linestrings):
+        return [], np.empty((0, 2))
+    xy, offsets = ragged_from_arcs(linestrings, dims=2)
+    vertex_id, vertices = coords_ids(xy)
+    return np.split(vertex_id, offsets[1:-1]), vertices
+
+
+def set_fingerprints(group_idx, member_idx, no_groups):
+    """
+    Function that computes for each group an order-independent fingerprint of the
+    distinct members it contains, together with the number of distinct members.
+
+    Parameters
+    ----------
+    group_idx : numpy.array
+        group index of each (group, member) occurrence
+    member_idx : numpy.array
+        member index of each (group, member) occurrence
+    no_groups : int
+        number of groups
+
+    Returns
+    -------
+    numpy.array
+        uint64 fingerprint for each group
+    numpy.array
+        number of distinct members in each group
+    """
+
+    group_idx = np.asarray(group_idx, dtype=np.int64)
+    member_idx = np.asarray(member_idx, dtype=np.int64)
+    no_members = member_idx.max() + 1 if len(member_idx) else 1
+
+    # distinct (group, member) pairs packed into a single integer key
+    pairs = np.unique(group_idx * no_members + member_idx)
+    pair_group = pairs // no_members
+    pair_member = pairs % no_members
+
+    fingerprints = np.zeros(no_groups, dtype=np.uint64)
+    counts = np.bincount(pair_group, minlength=no_groups)
+    if len(pairs):
+        starts = np.flatnonzero(np.diff(pair_group, prepend=-1))
+        with np.errstate(over="ignore"):
+            sums = np.add.reduceat(hash_ids(pair_member), starts)
+        fingerprints[pair_group[starts]] = sums
+    return fingerprints, counts
+
+
+def shared_coords_junctions(linestrings, vertex_ids=None, vertices=None):
+    """
+    Function that detects junctions using the coords-connected strategy. Each vertex
+    is packed together with its two neighbours into integer keys for all
+    linestrings at once. A vertex is a junction when it does not have the same pair
+    of neighbours at each occurrence.
+
+    Parameters
+    ----------
+    linestrings : list of shapely.geometry.LineString
+        list of linestrings to detect junctions in
+    vertex_ids : list of numpy.array, optional
+        for each linestring the ids of its vertices in `vertices`, as created by
+        `linestring_vertex_ids()`. Default is None, the ids are computed.
+    vertices : numpy.array, optional
+        2-dimensional array with the distinct coordinates, indexed by id. Required
+        if `vertex_ids` is given.
+
+    Returns
+    -------
+    numpy.array
+        2-dimensional array with the unique coordinates of the junctions
+    """
+
+    if vertex_ids is None:
+        vertex_ids, vertices = linestring_vertex_ids(linestrings)
+    vertex_ids = [ids for ids in vertex_ids if len(ids)]
+    if not vertex_ids:
+        return np.empty((0, 2))
+
+    lengths = np.array([len(ids) for ids in vertex_ids], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    vertex_id = np.concatenate(vertex_ids)
+    no_vertices = len(vertices)
+
+    # index of the previous and next vertex, wrapping around at the line ends
+    position = np.arange(len(vertex_id))
+    idx_prev = position - 1
+    idx_next = position + 1
+    idx_prev[offsets[:-1]] = offsets[1:] - 1
+    idx_next[offsets[1:] - 1] = offsets[:-1]
+
+    # pack the unordered pair of neighbours into a single key
+    id_prev = vertex_id[idx_prev]
+    id_next = vertex_id[idx_next]
+    neighs = np.minimum(id_prev, id_next) * no_vertices + np.maximum(id_prev, id_next)
+
+    # a vertex is a junction if its neighbours differ between occurrences
+    order = np.lexsort((neighs, vertex_id))
+    sorted_ids = vertex_id[order]
+    sorted_neighs = neighs[order]
+    differ = (sorted_ids[1:] == sorted_ids[:-1]) & (
+        sorted_neighs[1:] != sorted_neighs[:-1]
+    )
+    return vertices[np.unique(sorted_ids[1:][differ])]
+
+
+def shared_segment_junctions(linestrings, vertex_ids=None, vertices=None):
+    """
+    Function that detects the junctions of shared paths by hashing the undirected
+    segments of all linestrings at once. A shared path is a run of segments that
+    is contained in more than one linestring. For each segment the set of
+    linestrings containing it is fingerprinted. A vertex is a junction where the
+    fingerprints of its incoming and outgoing segment differ (a shared run begins or
+    ends) or where an open linestring ends on a shared segment.
+
+    This is a replacement for the pairwise computation of
+    `linemerge_ext(geom1.intersection(geom2))`, but requires that shared paths are
+    built from equal vertices, which is the case for prequantized input.
+    Linestrings that are equal to each other do not produce junctions.
+
+    Parameters
+    ----------
+    linestrings : list of shapely.geometry.LineString
+        list of linestrings to detect junctions in
+    vertex_ids : list of numpy.array, optional
+        for each linestring the ids of its vertices in `vertices`, as created by
+        `linestring_vertex_ids()`. Default is None, the ids are computed.
+    vertices : numpy.array, optional
+        2-dimensional array with the distinct coordinates, indexed by id. Required
+        if `vertex_ids` is given.
+
+    Returns
+    -------
+    numpy.array
+        2-dimensional array with the unique coordinates of the junctions
+    """
+
+    # identify each distinct vertex by an integer
+    if vertex_ids is None:
+        vertex_ids, vertices = linestring_vertex_ids(linestrings)
+    vertex_ids = [ids for ids in vertex_ids if len(ids) > 1]
+    if not vertex_ids:
+        return np.empty((0, 2))
+
+    # flat vertex buffer, each line is referenced as slice of offsets
+    lengths = np.array([len(ids) for ids in vertex_ids], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    vertex_id = np.concatenate(vertex_ids)
+    no_vertices = len(vertices)
+    no_lines = len(lengths)
+    starts = offsets[:-1]
+    ends = offsets[1:] - 1
+
+    # segment i is the segment that starts at vertex i, segments are only valid if the
+    # next vertex belongs to the same line
+    seg_valid = np.ones(len(vertex_id), dtype=bool)
+    seg_valid[ends] = False
+    seg_idx = np.flatnonzero(seg_valid)
+    seg_line = np.repeat(np.arange(no_lines), lengths - 1)
+    seg_a = vertex_id[seg_idx]
+    seg_b = vertex_id[seg_idx + 1]
+
+    # undirected segment key, so AB and BA are considered the same segment
+    seg_key = np.minimum(seg_a, seg_b) * no_vertices + np.maximum(seg_a, seg_b)
+    _, seg_uid = np.unique(seg_key, return_inverse=True)
+    seg_uid = seg_uid.reshape(-1)
+    no_segs = seg_uid.max() + 1
+
+    # fingerprint of the linestrings sharing each segment
+    seg_fp, seg_count = set_fingerprints(seg_uid, seg_line, no_segs)
+
+    # fingerprint of the segments of each linestring, used to identify equal lines
+    line_fp, line_count = set_fingerprints(seg_line, seg_uid, no_lines)
+    with np.errstate(over="ignore"):
+        line_fp = line_fp + hash_ids(line_count)
+
+    # a shared segment is only of interest if it is shared with a non-equal line
+    seg_line_fp = line_fp[seg_line]
+    fp_min = np.full(no_segs, np.iinfo(np.uint64).max, dtype=np.uint64)
+    fp_max = np.zeros(no_segs, dtype=np.uint64)
+    np.minimum.at(fp_min, seg_uid, seg_line_fp)
+    np.maximum.at(fp_max, seg_uid, seg_line_fp)
+    seg_non_equal = fp_min != fp_max
+
+    # position of the first segment of each line in the segment arrays
+    seg_offsets = np.concatenate([[0], np.cumsum(lengths - 1)])
+    first_seg = seg_offsets[:-1]
+    last_seg = seg_offsets[1:] - 1
+    is_closed = (vertex_id[starts] == vertex_id[ends]) & (lengths > 3)
+
+    # interior vertices: compare the incoming and the outgoing segment
+    seg_prev = np.arange(len(seg_uid) - 1)
+    seg_next = seg_prev + 1
+    interior = seg_line[seg_prev] == seg_line[seg_next]
+    seg_prev = seg_prev[interior]
+    seg_next = seg_next[interior]
+
+    # closed lines: also compare the last segment with the first segment
+    seg_prev = np.concatenate([seg_prev, last_seg[is_closed]])
+    seg_next = np.concatenate([seg_next, first_seg[is_closed]])
+
+    uid_prev = seg_uid[seg_prev]
+    uid_next = seg_uid[seg_next]
+    changed = (seg_fp[uid_prev] != seg_fp[uid_next]) | (
+        seg_count[uid_prev] != seg_count[uid_next]
+    )
+    vertex_junctions = seg_idx[seg_next[changed]]
+
+    # open lines: the endpoints are junctions if a shared run ends there
+    is_open = ~is_closed
+    uid_first = seg_uid[first_seg[is_open]]
+    uid_last = seg_uid[last_seg[is_open]]
+    start_junctions = starts[is_open][seg_non_equal[uid_first]]
+    end_junctions = ends[is_open][seg_non_equal[uid_last]]
+
+    junctions = np.concatenate([vertex_junctions, start_junctions, end_junctions])
+    return vertices[np.unique(vertex_id[junctions])]
+
+
+def node_linestrings(linestrings, vertex_ids=None, vertices=None):
+    """
+    Function that inserts a vertex into a segment wherever a vertex of any
+    linestring lies on the interior of that segment. Collinear overlaps are
+    afterwards built from equal vertices, so shared paths can be detected from the
+    coordinates only, see `shared_segment_junctions()`. All segments are indexed
+    and all vertices are tested at once.
+
+    Parameters
+    ----------
+    linestrings : list of shapely.geometry.LineString
+        list of linestrings to node
+    vertex_ids : list of numpy.array, optional
+        for each linestring the ids of its vertices in the table of vertices.
+        Default is None, the ids are derived from the coordinates.
+    vertices : numpy.array, optional
+        2-dimensional array with the distinct coordinates, indexed by id
+
+    Returns
+    -------
+    numpy.array
+        array of shapely.geometry.LineString, with the inserted vertices
+    """
+
+    xy, offsets = ragged_from_arcs(linestrings, dims=2)
+    lengths = np.diff(offsets)
+    line_idx = np.repeat(np.arange(len(linestrings)), lengths)
+
+    # each coordinate that is not the end of its linestring starts a segment
+    is_start = np.ones(len(xy), dtype=bool)
+    is_start[np.cumsum(lengths)[lengths > 0] - 1] = False
+    seg_start = np.flatnonzero(is_start)
+    segments = shapely.linestrings(np.stack([xy[seg_start], xy[seg_start + 1]], 1))
+
+    # vertices on a segment, other than the vertices of the segment itself
+    if vertex_ids is None or vertices is None or not len(xy):
+        vertex_id, vertices = coords_ids(xy)
+    else:
+        vertex_id = np.concatenate(vertex_ids)
+    used_ids = np.unique(vertex_id)
+    idx_vertex, idx_seg = STRtree(segments).query(
+        shapely.points(vertices[used_ids]), predicate="intersects"
+    )
+    idx_vertex = used_ids[idx_vertex]
+    interior = (vertex_id[seg_start[idx_seg]] != idx_vertex) & (
+        vertex_id[seg_start[idx_seg] + 1] != idx_vertex
+    )
+    idx_vertex, idx_seg = idx_vertex[interior], idx_seg[interior]
+
+    # order the inserted vertices along their segment
+    seg_a, seg_b = xy[seg_start[idx_seg]], xy[seg_start[idx_seg] + 1]
+    position = np.einsum("ij,ij->i", vertices[idx_vertex] - seg_a, seg_b - seg_a)
+    order = np.lexsort((position, idx_seg))
+    idx_vertex, idx_seg = idx_vertex[order], idx_seg[order]
+
+    noded_xy = np.insert(xy, seg_start[idx_seg] + 1, vertices[idx_vertex], axis=0)
+    noded_idx = np.insert(
+        line_idx, seg_start[idx_seg] + 1, line_idx[seg_start[idx_seg]]
+    )
+    return shapely.linestrings(noded_xy, indices=noded_idx)
+
+
 def quantize(linestrings, bbox, quant_factor=1e5):
     """
     Function that applies quantization. Quantization removes information by reducing
@@ -914,33 +1916,168 @@ def delta_encoding(linestrings):
         LineStrings that are delta-encoded
     """
 
-    for idx, ls in enumerate(linestrings):
-        if hasattr(ls, "coords"):
-            ls = np.array(ls.coords).astype(np.int64)
-        else:
-            ls = np.array(ls).astype(np.int64)
-        ls_p1 = copy.copy(ls[0])
-        ls -= np.roll(ls, 1, axis=0)
-        ls[0] = ls_p1
+    # encode all linestrings at once on a ragged coordinate store
+    coords, offsets = ragged_from_arcs(linestrings)
+    coords = coords.astype(np.int64)
+    delta = np.empty_like(coords)
+    delta[1:] = coords[1:] - coords[:-1]
+    starts = offsets[:-1][np.diff(offsets) > 0]
+    delta[starts] = coords[starts]
+
+    for idx, ls in enumerate(arcs_from_ragged(delta, offsets)):
         linestrings[idx] = ls.tolist()
     return linestrings
 
 
-def cart(arr):
+def canonical_arcs(ids, offsets):
+    """
+    Function that brings the vertex ids of all arcs of a ragged store in a canonical
+    form at once, so arcs that are equal up to their direction, or closed arcs that
+    are equal up to their start vertex, get the same sequence of ids. Closed arcs
+    start at their smallest vertex id and the closing vertex is left out. Of the two
+    directions the lexicographically smallest sequence is selected.
+
+    Parameters
+    ----------
+    ids : numpy.array
+        vertex ids of the coordinates of all arcs
+    offsets : numpy.array
+        offsets of the arcs in ids, see `ragged_from_arcs()`
+
+    Returns
+    -------
+    numpy.array
+        canonical vertex ids of all arcs
+    numpy.array
+        offsets of the arcs in the canonical vertex ids
+    numpy.array
+        boolean array, True for each closed arc
+    """
+
+    lengths = np.diff(offsets)
+    no_arcs = len(lengths)
+    starts, ends = offsets[:-1], offsets[1:] - 1
+    is_closed = lengths > 1
+    is_closed[is_closed] = ids[starts[is_closed]] == ids[ends[is_closed]]
+
+    # the closing vertex of a closed arc is left out
+    no_ids = lengths - is_closed
+    canon_offsets = np.concatenate([[0], np.cumsum(no_ids)])
+    arc_idx = np.repeat(np.arange(no_arcs), no_ids)
+    position = np.arange(canon_offsets[-1]) - canon_offsets[:-1][arc_idx]
+    arc_ids = ids[starts[arc_idx] + position]
+
+    # closed arcs start at the first occurrence of their smallest vertex id
+    shift = np.zeros(no_arcs, dtype=np.int64)
+    order = np.lexsort((position, arc_ids, arc_idx))
+    first = np.flatnonzero(np.diff(arc_idx[order], prepend=-1))
+    shift[is_closed] = position[order[first]][is_closed]
+    is_min = arc_ids == arc_ids[order[first]][arc_idx]
+    ambiguous = is_closed & (np.bincount(arc_idx[is_min], minlength=no_arcs) > 1)
+
+    # the forward and the backward sequence of each arc
+    size = no_ids[arc_idx]
+    fw = (position + shift[arc_idx]) % size
+    bw = np.where(
+        is_closed[arc_idx], (shift[arc_idx] - position) % size, size - 1 - position
+    )
+    fw_ids = arc_ids[canon_offsets[:-1][arc_idx] + fw]
+    bw_ids = arc_ids[canon_offsets[:-1][arc_idx] + bw]
+
+    # select the backward sequence if it is smaller at the first differing position
+    differ = np.where(fw_ids != bw_ids, position, np.iinfo(np.int64).max)
+    first_differ = np.full(no_arcs, np.iinfo(np.int64).max)
+    np.minimum.at(first_differ, arc_idx, differ)
+    use_bw = first_differ < no_ids
+    at = canon_offsets[:-1][use_bw] + first_differ[use_bw]
+    use_bw[use_bw] = bw_ids[at] < fw_ids[at]
+    canon_ids = np.where(use_bw[arc_idx], bw_ids, fw_ids)
+
+    # closed arcs passing their smallest vertex more than once try all rotations
+    for arc in np.flatnonzero(ambiguous):
+        seq = arc_ids[canon_offsets[arc] : canon_offsets[arc + 1]]
+        rotations = [np.roll(s, -k) for s in [seq, seq[::-1]] for k in range(len(s))]
+        canon_ids[canon_offsets[arc] : canon_offsets[arc + 1]] = min(
+            rotations, key=lambda rotation: rotation.tolist()
+        )
+
+    return canon_ids, canon_offsets, is_closed
+
+
+def duplicate_labels(segments_list, vertex_ids=None):
     """
-    Function that returns all combinations as a 2D array
-    [3, 152,  62, 52] is returned as [[152,  62], [152,  52], [152,   3]]
+    Function that labels each LineString by the highest index of the LineStrings it
+    is equal to. Two LineStrings are duplicates if they have the same sequence of
+    coordinates, where the reversed sequence is considered equal and for closed
+    LineStrings also each rotation of the sequence. All LineStrings are brought in
+    canonical form and hashed at once. Candidate duplicates with equal hashes are
+    confirmed by an exact comparison of their canonical form.
+
+    Parameters
+    ----------
+    segments_list : list of numpy.array
+        list of valid paths
+    vertex_ids : numpy.array, optional
+        id of each coordinate of the concatenated paths in a table of vertices.
+        Default is None, the ids are derived from the coordinates.
+
+    Returns
+    -------
+    numpy.array
+        for each LineString the index of the representative of its group, a
+        LineString without duplicates is its own representative
     """
-    arr = -np.sort(-arr)
-    arr = np.array(np.meshgrid(arr[0], arr[1:])).T.reshape(-1, 2)
-    return arr
+
+    if not len(segments_list):
+        return np.empty(0, dtype=np.int64)
+    coords, offsets = ragged_from_arcs(segments_list, dims=2)
+    ids = vertex_ids if vertex_ids is not None else coords_ids(coords)[0]
+    canon_ids, canon_offsets, is_closed = canonical_arcs(ids, offsets)
+
+    # position dependent hash of the canonical vertex ids of each arc
+    no_ids = np.diff(canon_offsets)
+    arc_idx = np.repeat(np.arange(len(no_ids)), no_ids)
+    position = np.arange(len(canon_ids)) - canon_offsets[:-1][arc_idx]
+    with np.errstate(over="ignore"):
+        hashes = hash_ids(hash_ids(canon_ids) ^ hash_ids(position))
+    arc_hash = np.zeros(len(no_ids), dtype=np.uint64)
+    np.add.at(arc_hash, arc_idx, hashes)
+
+    # candidate duplicates have the same hash, number of ids and closedness
+    order = np.lexsort((np.arange(len(no_ids)), is_closed, no_ids, arc_hash))
+    is_new = np.ones(len(order), dtype=bool)
+    is_new[1:] = (
+        (np.diff(arc_hash[order]) != 0)
+        | (np.diff(no_ids[order]) != 0)
+        | (np.diff(is_closed[order].astype(np.int8)) != 0)
+    )
+    group = np.empty(len(order), dtype=np.int64)
+    group[order] = np.cumsum(is_new) - 1
+
+    # confirm candidates by comparing their canonical ids to the first candidate
+    first = order[is_new][group]
+    rows = canon_offsets[:-1][first][arc_idx] + position
+    confirmed = np.bincount(arc_idx[canon_ids != canon_ids[rows]], minlength=len(group))
+    for arc in np.flatnonzero(confirmed):
+        # a hash collision, group the arc with the arcs that are equal to it
+        group[arc] = len(group) + arc
+        seq = canon_ids[canon_offsets[arc] : canon_offsets[arc + 1]]
+        for other in np.flatnonzero(confirmed[:arc]):
+            other_seq = canon_ids[canon_offsets[other] : canon_offsets[other + 1]]
+            if first[other] == first[arc] and np.array_equal(seq, other_seq):
+                group[arc] = group[other]
+                break
+
+    # label each arc by the highest index of its group
+    representative = np.full(group.max() + 1, -1, dtype=np.int64)
+    np.maximum.at(representative, group, np.arange(len(group)))
+    return representative[group]
 
 
 def find_duplicates(segments_list, type="array"):
     """
-    Function for solely detecting and recording duplicate LineStrings. The function
-    converts and sorts the coordinates of each linestring and gets the hash. Using the
-    hashes it can quickly detect duplicates and return the indices.
+    Function for solely detecting and recording duplicate LineStrings, see
+    `duplicate_labels()` for the definition of duplicates.
 
     Parameters
     ----------
@@ -949,82 +2086,136 @@ def find_duplicates(segments_list, type="array"):
     type : str
         set if paths is `array` or `linestring`
 
+    Returns
+    -------
+    numpy.array or list
+        pairs of indices of duplicate LineStrings, the first index of each pair is
+        the highest. An empty list if there are no duplicates.
     """
 
-    # get hash of sorted linestring coordinates
-    hash_segments = []
-
     if type != "array":
-        segments_list = [
-            np.array(list(linestring.coords)) for linestring in segments_list
-        ]
-    for coordinates in segments_list:
-        # If start and end points are the same, remove end point before sorting
-        # Rmark: check if it was originally a ring is not relevant, because lines with
-        # equal start and end point are no probem to be deduplicated with rings.
-        if np.array_equal(coordinates[0], coordinates[-1]):
-            coordinates = coordinates[0:-1]
-            coordinates = np.sort(coordinates, axis=0)
-            coordinates = np.append(coordinates[0:2], coordinates)
-        else:
-            coordinates = np.sort(coordinates, axis=0)
-        hash_segments.append(hash(bytes(coordinates)))
-    hash_segments = np.array(hash_segments, dtype=np.int64)
-
-    # get split locations of dups
-    idx_sort = np.argsort(hash_segments)
-    sorted_hashes = hash_segments[idx_sort]
-    _, idx_start, count = np.unique(
-        sorted_hashes, return_counts=True, return_index=True
-    )
-    if count.max() > 1:
-        # split on indices that occurs > 1
-        idx_dups = np.split(idx_sort, idx_start[1:])
-        list_dups = []
-        for dup in idx_dups:
-            if dup.size > 2:
-                list_dups.append(cart(dup))
-            elif dup.size > 1:
-                list_dups.append(dup)
-        idx_dups = np.vstack(list_dups)
-
-        # apply sorting on duplicate-pairs
-        # pylint: disable=invalid-unary-operand-type
-        idx_dups = -np.sort(-idx_dups, axis=1)
-        idx_dups = idx_dups[np.argsort(idx_dups[:, 0])]
-        return idx_dups
-    else:
+        segments_list = [np.asarray(linestring.coords) for linestring in segments_list]
+    return pairs_from_labels(duplicate_labels(segments_list))
+
+
+def pairs_from_labels(labels):
+    """
+    Function that expands the labels of duplicate LineStrings into pairs of the
+    representative of each group with each other member of the group.
+
+    Parameters
+    ----------
+    labels : numpy.array
+        for each LineString the index of the representative of its group
+
+    Returns
+    -------
+    numpy.array or list
+        pairs of indices of duplicate LineStrings, ordered by the representative
+        and descending within a group. An empty list if there are no duplicates.
+    """
+
+    idx = np.arange(len(labels))
+    is_dup = labels != idx
+    if not is_dup.any():
         return []
+    order = np.lexsort((-idx[is_dup], labels[is_dup]))
+    return np.column_stack([labels[is_dup], idx[is_dup]])[order]
 
 
-def map_values(arr, search_vals, replace_vals):
+def arc_chains(start_nodes, end_nodes, indptr, indices, is_ring=None):
     """
-    This function replace values element-wise in a numpy array.
-    Its quick and avoids a np.where-loop (which is slow).
-    The result is a new array, not inplace.
+    Function that finds the chains of arcs that can be stitched into a single arc.
+    Two arcs are stitched where they meet at a node that is touched by no other arc
+    and where every linestring passing one of them continues in the other, so they
+    are always used together in the same order. Consecutive arcs are derived from
+    the bookkeeping of the linestrings, where the last arc of a ring is followed by
+    its first arc. A ring of which all nodes are passed becomes a single arc.
 
     Parameters
     ----------
-    arr : np.array
-        input array
-    search_vals : list or 1D np.array
-        array with 'bad' values
-    replace_vals : list or 1D np.array
-        array with 'good' values
+    start_nodes : numpy.array
+        node id of the first vertex of each arc
+    end_nodes : numpy.array
+        node id of the last vertex of each arc
+    indptr : numpy.array
+        pointers to the arcs of each linestring in indices
+    indices : numpy.array
+        arcs of all linestrings
+    is_ring : numpy.array, optional
+        for each linestring True if it is a ring. Default is None, no rings.
 
     Returns
     -------
-    np.array
-        new array with replaced values
+    list of numpy.array
+        for each chain the indices of its arcs in order of traversal
+    list of numpy.array
+        for each chain a boolean array, True if the arc is traversed backwards
     """
-    N = max(arr.max(), max(search_vals)) + 1
-    maparr = np.empty(N, dtype=np.int64)
 
-    maparr[arr] = arr
-    maparr[search_vals] = replace_vals
+    no_nodes = max(start_nodes.max(initial=-1), end_nodes.max(initial=-1)) + 1
+    degree = np.bincount(np.concatenate([start_nodes, end_nodes]), minlength=no_nodes)
+    uses = np.bincount(
+        np.concatenate([start_nodes[indices], end_nodes[indices]]), minlength=no_nodes
+    )
 
-    arr_upd = maparr[arr]
-    return arr_upd
+    # consecutive arcs within a linestring and the node they share, the last and
+    # the first arc of a ring are consecutive as well
+    row = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    same_row = row[:-1] == row[1:]
+    arc_a, arc_b = indices[:-1][same_row], indices[1:][same_row]
+    if is_ring is not None:
+        wraps = np.flatnonzero(np.asarray(is_ring, dtype=bool) & (np.diff(indptr) > 1))
+        arc_a = np.concatenate([arc_a, indices[indptr[wraps + 1] - 1]])
+        arc_b = np.concatenate([arc_b, indices[indptr[wraps]]])
+    sa, ea = start_nodes[arc_a], end_nodes[arc_a]
+    sb, eb = start_nodes[arc_b], end_nodes[arc_b]
+    share_start = (sa == sb) | (sa == eb)
+    share_end = (ea == sb) | (ea == eb)
+    valid = (share_start != share_end) & (arc_a != arc_b) & (sa != ea) & (sb != eb)
+    arc_a, arc_b = arc_a[valid], arc_b[valid]
+    node = np.where(share_end[valid], ea[valid], sa[valid])
+
+    # a node is passed through if all uses of the arcs ending in it are consecutive
+    adjacent = np.bincount(node, minlength=no_nodes)
+    passed = (degree == 2) & (adjacent > 0) & (uses == 2 * adjacent)
+    node, first = np.unique(node, return_index=True)
+    is_link = passed[node]
+    node, arc_a, arc_b = node[is_link], arc_a[first][is_link], arc_b[first][is_link]
+
+    # link each arc to the arc it is stitched to at its first and its last vertex
+    link = np.full((len(start_nodes), 2), -1, dtype=np.int64)
+    for arc, other in [(arc_a, arc_b), (arc_b, arc_a)]:
+        link[arc, (end_nodes[arc] == node).astype(int)] = other
+
+    # walk the chains from an arc that is linked at one end only, the arcs that are
+    # left are closed chains and are walked from any of their arcs
+    chains, reversed_arcs = [], []
+    no_links = (link >= 0).sum(axis=1)
+    starts = np.concatenate(
+        [np.flatnonzero(no_links == 1), np.flatnonzero(no_links == 2)]
+    )
+    for arc in starts:
+        if link[arc, 0] == -2:
+            continue
+        chain, backward = [], []
+        is_backward = link[arc, 1] == -1
+        while arc >= 0 and link[arc, 0] != -2:
+            chain.append(arc)
+            backward.append(is_backward)
+            next_arc = link[arc, int(not is_backward)]
+            link[arc] = -2
+            if next_arc >= 0:
+                exit_node = start_nodes[arc] if is_backward else end_nodes[arc]
+                is_backward = end_nodes[next_arc] == exit_node
+            arc = next_arc
+        # keep the direction of the first arc of the chain
+        if backward[0]:
+            chain, backward = chain[::-1], [not is_bw for is_bw in backward[::-1]]
+        chains.append(np.array(chain))
+        reversed_arcs.append(np.array(backward))
+
+    return chains, reversed_arcs
 
 
 def remove_collinear_points(line: np.ndarray) -> np.ndarray:
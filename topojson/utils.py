@@ -1,9 +1,11 @@
 import numpy as np
 import pprint
 import json
+from .ops import arcs_from_ragged
 from .ops import dequantize
+from .ops import dequantize_ragged
 from .ops import bounds
-from .ops import np_array_from_arcs
+from .ops import ragged_from_arcs
 from .ops import winding_order
 
 
@@ -28,6 +30,10 @@ class TopoOptions(object):
         winding_order=None,
         object_name="data",
         ignore_index=False,
+        join_method="auto",
+        n_jobs=1,
+        tiles=None,
+        topology_scope=None,
     ):
         # get all arguments
         arguments = locals()
@@ -97,6 +103,35 @@ class TopoOptions(object):
         else:
             self.ignore_index = False
 
+        if "join_method" in arguments:
+            self.join_method = arguments["join_method"]
+        else:
+            self.join_method = "auto"
+
+        if "n_jobs" in arguments:
+            self.n_jobs = arguments["n_jobs"]
+        else:
+            self.n_jobs = 1
+
+        if "tiles" in arguments:
+            self.tiles = arguments["tiles"]
+        else:
+            self.tiles = None
+        if self.tiles is not None and (
+            isinstance(self.tiles, bool)
+            or not isinstance(self.tiles, (int, np.integer))
+            or self.tiles < 1
+        ):
+            raise ValueError(
+                "Parameter `tiles` must be None or a positive integer. '{}' was "
+                "given".format(self.tiles)
+            )
+
+        if "topology_scope" in arguments:
+            self.topology_scope = arguments["topology_scope"]
+        else:
+            self.topology_scope = None
+
     def __repr__(self):
         return "TopoOptions(\n  {}\n)".format(pprint.pformat(self.__dict__))
 
@@ -377,8 +412,10 @@ def serialize_as_topojson(data, options):
         else:
             scale = data["transform"]["scale"]
             translate = data["transform"]["translate"]
-            dequ_arcs = dequantize(np_array_from_arcs(data["arcs"]), scale, translate)
-            parse_topo["bbox"] = bounds(dequ_arcs)
+            coords, offsets = ragged_from_arcs(data["arcs"])
+            parse_topo["bbox"] = bounds(
+                dequantize_ragged(coords, offsets, scale, translate)
+            )
     else:
         parse_topo["bbox"] = bounds(arcs_asarray)
 
@@ -421,17 +458,14 @@ def serialize_as_svg(topo_object, separate=False, include_junctions=False):
             # dequantize if quantization is applied
             if "transform" in topo_object:
 
-                np_arcs = np_array_from_arcs(arcs)
+                coords, offsets = ragged_from_arcs(arcs)
 
                 transform = topo_object["transform"]
                 scale = transform["scale"]
                 translate = transform["translate"]
 
-                np_arcs = dequantize(np_arcs, scale, translate)
-                l_arcs = []
-                for ls in np_arcs:
-                    l_arcs.append(ls[~np.isnan(ls)[:, 0]].tolist())
-                arcs = l_arcs
+                coords = dequantize_ragged(coords, offsets, scale, translate)
+                arcs = arcs_from_ragged(coords, offsets)
 
             arcs = [geometry.LineString(arc) for arc in arcs]
 
@@ -516,17 +550,18 @@ def serialize_as_geojson(
         translate = transform["translate"]
 
     if arcs:
-        np_arcs = np_array_from_arcs(arcs)
+        coords, offsets = ragged_from_arcs(arcs)
         # dequantize if quantization is applied
         if transform:
-            np_arcs = dequantize(np_arcs, scale, translate)
+            coords = dequantize_ragged(coords, offsets, scale, translate)
+
+        # evenly round the coordinates to the given number of decimals
+        if decimals is not None and isinstance(decimals, int):
+            coords = np.around(coords, decimals=decimals)
+        np_arcs = arcs_from_ragged(coords, offsets)
     else:
         np_arcs = None
 
-    # evenly round the coordinates to the given number of decimals
-    if decimals is not None and isinstance(decimals, int):
-        np_arcs = np.around(np_arcs, decimals=decimals)
-
     # select object member from topology object
     if objectname not in topo_object["objects"]:
         raise LookupError(f"'{objectname}' is not an object name in your topojson file")